@@ -1,4 +1,5 @@
 #!/bin/bash
 
 chappie_root=$(realpath `dirname "$0"`)
-$(python3 $chappie_root/src/python/run "$@")
+# the launcher only needs the standard library, so site-packages are skipped to start faster
+$(python3 -S $chappie_root/src/python/run "$@")
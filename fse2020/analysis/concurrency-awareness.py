@@ -1,8 +1,8 @@
 #!/usr/bin/python3
 
 import argparse
-import json
 import os
+import sys
 
 from itertools import product
 
@@ -15,28 +15,16 @@ import pandas as pd
 
 from tqdm import tqdm
 
-def parse_timestamp(path):
-    ts = np.sort([int(t) for t in json.load(open(path)).values()])
-    return (np.max(ts) - np.min(ts)) / 1000000000
-
-_RAPL_WRAPAROUND = 16384
-
-def rapl_wrap_around(reading):
-    if reading >= 0:
-        return reading
-    else:
-        return max(reading + _RAPL_WRAPAROUND, 0)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
 
-def parse_energy(path, i):
-    energy = pd.read_csv(path, delimiter = ';')
+from dataset import Dataset
+from filtering import filter_to_application
 
-    energy.package = energy.groupby('socket').package.diff()
-    energy.dram = energy.groupby('socket').dram.diff()
-
-    energy.package = energy.package.map(rapl_wrap_around)
-    energy.dram = energy.dram.map(rapl_wrap_around)
-    energy = energy.fillna(0)
+def parse_timestamp(ts):
+    ts = np.sort([int(t) for t in ts.values()])
+    return (np.max(ts) - np.min(ts)) / 1000000000
 
+def parse_energy(energy, i):
     energy = energy.groupby('epoch')[['package', 'dram']].sum().sum(axis = 1).reset_index()
     energy['timestamp'] = energy.epoch.map(i).fillna(0).astype(int) // 1000000
     energy.set_index('timestamp')[0]
@@ -45,44 +33,6 @@ def parse_energy(path, i):
     return energy
 
 
-def filter_to_application_(trace):
-    try:
-        while len(trace) > 0:
-            record = trace[0]
-            exclude = False
-            exclude = any((
-                (r'.' not in record),
-                (r'java.' in record and '.java\.' not in record),
-                (r'javax.' in record and '.javax\.' not in record),
-                (r'jdk.' in record and '.jdk\.' not in record),
-                (r'sun.' in record and '.sun\.' not in record),
-                (r'org.apache.commons.' in record and '.org.apache.commons\.' not in record),
-                (r'<init>' in record),
-                (r'.so' in record),
-                (r'::' in record),
-                (r'[' in record),
-                (r']' in record)
-            ))
-            if not exclude:
-                return trace
-            else:
-                trace.pop(0)
-    except:
-        pass
-
-    return 'end'
-
-
-def filter_to_application(df):
-    mask = (df.trace == 'end') | df.trace.str.contains('chappie') | df.trace.str.contains('jlibc') | df.trace.str.contains('jrapl')
-    df = df[~mask]
-    df.trace = df.trace.str.split('@').map(filter_to_application_)
-    method = df.trace.str[0]
-    df = df[(df.trace != 'end') & (method != 'e') & ~(method.str.contains('org.dacapo.harness'))]
-
-    return df
-
-
 def ranking_plot(df):
     ax = df.plot.bar(
         legend = False,
@@ -105,46 +55,33 @@ def ranking_plot(df):
     return ax.get_figure()
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-work-directory')
-    args = parser.parse_args()
-
-    data_path = args.work_directory
-    plots_path = os.path.join(data_path, 'plots')
-    if not os.path.exists(plots_path):
-        os.mkdir(plots_path)
-
-    calm_data = os.path.join(data_path, 'calmness', 'calm')
-    profile_data = os.path.join(data_path, 'profiling')
-    file_from = lambda k: os.path.join('raw', str(k))
+def report(dataset):
+    plots_path = dataset.plots()
 
-    benchs = np.sort(os.listdir(calm_data))
+    benchs = dataset.benchmarks()
     benchs_ = tqdm(benchs)
 
     summary = []
     for bench in benchs_:
         benchs_.set_description(bench)
 
-        if not os.path.exists(os.path.join(plots_path, bench)):
-            os.mkdir(os.path.join(plots_path, bench))
-        runs = np.sort(os.listdir(os.path.join(calm_data, bench, 'raw')))
-        runs = runs[(len(runs) // 5):]
+        dataset.plots(bench)
+        runs = dataset.runs(bench)
+        batches = dataset.batches(bench)
 
-        df = pd.concat([pd.read_csv(
-            os.path.join(profile_data, bench, str(n), file_from(k), 'method.csv'),
-            delimiter = ';'
-        ).assign(iter = k) for n, k in product(os.listdir(os.path.join(profile_data, bench)), runs)])
+        df = pd.concat([dataset.table(
+            dataset.profiling(bench, n, k, 'method.csv')
+        ).assign(iter = k) for n, k in product(batches, runs)])
         df.timestamp //= 1000000
 
-        id = [{int(k): int(v) for k, v in json.load(open(
-            os.path.join(profile_data, bench, str(n), file_from(k), 'time.json'))
-        ).items()} for n, k in product(os.listdir(os.path.join(profile_data, bench)), runs)]
+        id = [{int(k): int(v) for k, v in dataset.json(
+            dataset.profiling(bench, n, k, 'time.json')
+        ).items()} for n, k in product(batches, runs)]
 
         energy = pd.concat([parse_energy(
-            os.path.join(profile_data, bench, str(n), file_from(k), 'energy.csv'),
+            dataset.energy(dataset.profiling(bench, n, k, 'energy.csv')),
             i
-        ) for (n, k), i in zip(product(os.listdir(os.path.join(profile_data, bench)), runs), id)])
+        ) for (n, k), i in zip(product(batches, runs), id)])
 
         df = pd.merge(df, energy, on = 'timestamp', how = 'left').dropna(subset = [0])
         df = filter_to_application(df)
@@ -152,9 +89,7 @@ def main():
         obliv = df.groupby('method')[0].sum()
         obliv.name = 'energy'
 
-        df = pd.concat([pd.read_csv(
-            os.path.join(profile_data, bench, str(n), 'summary', 'method.csv')
-        ) for n in os.listdir(os.path.join(profile_data, bench))])
+        df = pd.concat([dataset.summary(bench, n, 'method') for n in batches])
         df['method'] = df.trace.str.split(';').str[0]
         df = df.groupby('method').energy.sum() * 8
 
@@ -178,5 +113,12 @@ def main():
     s.index.name = 'bench'
     s.to_csv(os.path.join(plots_path, 'awareness-correlation.csv'), header = True)
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    args = parser.parse_args()
+
+    report(Dataset(args.work_directory))
+
 if __name__ == '__main__':
     main()
@@ -1,8 +1,8 @@
 #!/usr/bin/python3
 
 import argparse
-import json
 import os
+import sys
 
 from itertools import product
 
@@ -15,37 +15,25 @@ import pandas as pd
 
 from tqdm import tqdm
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-work-directory')
-    args = parser.parse_args()
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
 
-    data_path = args.work_directory
-    plots_path = os.path.join(data_path, 'plots')
-    if not os.path.exists(plots_path):
-        os.mkdir(plots_path)
+from dataset import Dataset
 
-    rates = pd.read_csv(os.path.join(data_path, '.calm-rates'), delimiter = ' ', header = None)
-    rates.columns = ['bench', 'size', 'rate']
-    rates = rates.set_index('bench').rate.to_dict()
+def report(dataset):
+    plots_path = dataset.plots()
 
-    calm_data = os.path.join(data_path, 'calmness', 'calm')
-    profile_data = os.path.join(data_path, 'profiling')
-    file_from = lambda k: os.path.join('raw', str(k))
+    rates = dataset.calm_rates().set_index('bench').rate.to_dict()
 
-    benchs = np.sort(os.listdir(calm_data))
+    benchs = dataset.benchmarks()
     benchs_ = tqdm(benchs)
 
     summary = []
     for bench in benchs_:
         benchs_.set_description(bench)
 
-        if not os.path.exists(os.path.join(plots_path, bench)):
-            os.mkdir(os.path.join(plots_path, bench))
+        dataset.plots(bench)
 
-        df = pd.concat([pd.read_csv(
-            os.path.join(profile_data, bench, str(n), 'summary', 'method.csv')
-        ).assign(batch = n) for n in os.listdir(os.path.join(profile_data, bench))])
+        df = pd.concat([dataset.summary(bench, n, 'method').assign(batch = n) for n in dataset.batches(bench)])
 
         batches = df.batch.max()
 
@@ -84,5 +72,12 @@ def main():
     with open(os.path.join(plots_path, 'convergence-table.tex'), 'w') as f:
         [f.write(row) for row in table]
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    args = parser.parse_args()
+
+    report(Dataset(args.work_directory))
+
 if __name__ == '__main__':
     main()
@@ -2,6 +2,7 @@
 
 import argparse
 import os
+import sys
 
 from itertools import product
 from time import time
@@ -16,6 +17,10 @@ import seaborn as sns
 
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
+
+from dataset import Dataset
+
 def ranking_plot(df, colors):
     df.index = df.index.str.replace('$', '\$')
 
@@ -67,35 +72,22 @@ def get_n_contexts(df, n):
 
     return context
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-work-directory')
-    args = parser.parse_args()
-
-    data_path = args.work_directory
-    plots_path = os.path.join(data_path, 'plots')
-    if not os.path.exists(plots_path):
-        os.mkdir(plots_path)
+def report(dataset):
+    plots_path = dataset.plots()
 
-    calm_data = os.path.join(data_path, 'calmness', 'calm')
-    profile_data = os.path.join(data_path, 'profiling')
-    file_from = lambda k: os.path.join('raw', str(k))
-
-    benchs = np.sort(os.listdir(calm_data))
+    benchs = dataset.benchmarks()
     benchs_ = tqdm(benchs)
 
     summary = []
     for bench in benchs_:
         benchs_.set_description(bench)
 
-        if not os.path.exists(os.path.join(plots_path, bench)):
-            os.mkdir(os.path.join(plots_path, bench))
-        runs = np.sort(os.listdir(os.path.join(calm_data, bench, 'raw')))
-        runs = runs[(len(runs) // 5):]
+        dataset.plots(bench)
+        runs = dataset.runs(bench)
 
-        df = pd.concat([pd.read_csv(
-            os.path.join(profile_data, bench, str(n), 'summary', 'method.csv')
-        ).assign(batch = n) for n, k in product(os.listdir(os.path.join(profile_data, bench)), runs)])
+        df = pd.concat([
+            dataset.summary(bench, n, 'method').assign(batch = n) for n, k in product(dataset.batches(bench), runs)
+        ])
 
         df['method_'] = df.trace.str.split(';').str[0]
 
@@ -150,5 +142,12 @@ def main():
             plt.savefig(os.path.join(plots_path, bench, 'cfa2_{}.pdf'.format(i + 1)), bbox_inches = 'tight')
             plt.close()
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    args = parser.parse_args()
+
+    report(Dataset(args.work_directory))
+
 if __name__ == '__main__':
     main()
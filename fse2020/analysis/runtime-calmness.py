@@ -1,8 +1,8 @@
 #!/usr/bin/python3
 
 import argparse
-import json
 import os
+import sys
 
 from itertools import product
 
@@ -15,28 +15,15 @@ import pandas as pd
 
 from tqdm import tqdm
 
-def parse_timestamp(path):
-    ts = np.sort([int(t) for t in json.load(open(path)).values()])
-    return (np.max(ts) - np.min(ts)) / 100000000000
-
-_RAPL_WRAPAROUND = 16384
-
-def rapl_wrap_around(reading):
-    if reading >= 0:
-        return reading
-    else:
-        return max(reading + _RAPL_WRAPAROUND, 0)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
 
-def parse_energy(path):
-    energy = pd.read_csv(path, delimiter = ';')
+from dataset import Dataset
 
-    energy.package = energy.groupby('socket').package.diff()
-    energy.dram = energy.groupby('socket').dram.diff()
-
-    energy.package = energy.package.map(rapl_wrap_around)
-    energy.dram = energy.dram.map(rapl_wrap_around)
-    energy = energy.fillna(0)
+def parse_timestamp(ts):
+    ts = np.sort([int(t) for t in ts.values()])
+    return (np.max(ts) - np.min(ts)) / 100000000000
 
+def parse_energy(energy):
     return energy[['package', 'dram']].sum().sum()
 
 def calmness_plot(df, color = 'blue', label = None):
@@ -63,42 +50,28 @@ def calmness_plot(df, color = 'blue', label = None):
 
     return ax.get_figure()
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-work-directory')
-    args = parser.parse_args()
+def report(dataset):
+    plots_path = dataset.plots()
 
-    data_path = args.work_directory
-    plots_path = os.path.join(data_path, 'plots')
-    if not os.path.exists(plots_path):
-        os.mkdir(plots_path)
-
-    calm_data = os.path.join(data_path, 'calmness', 'calm')
-    profile_data = os.path.join(data_path, 'calmness', 'profile')
-    file_from = lambda k: os.path.join('raw', str(k))
-
-    benchs = np.sort(os.listdir(calm_data))
-    benchs = tqdm(benchs)
+    benchs = tqdm(dataset.benchmarks())
 
     summary = []
     for bench in benchs:
         benchs.set_description(bench + " - ref")
 
-        if not os.path.exists(os.path.join(plots_path, bench)):
-            os.mkdir(os.path.join(plots_path, bench))
-        runs = np.sort(os.listdir(os.path.join(calm_data, bench, 'raw')))
-        runs = runs[(len(runs) // 5):]
+        dataset.plots(bench)
+        runs = dataset.runs(bench)
 
         df = []
-        for rate in os.listdir(os.path.join(profile_data, bench)):
+        for rate in dataset.rates(bench):
             benchs.set_description(bench + " - " + rate)
 
             e = [parse_energy(
-                os.path.join(profile_data, bench, rate, file_from(k), 'energy.csv')
+                dataset.energy(dataset.profile(bench, rate, k, 'energy.csv'))
             ) for k in runs]
 
             t = [parse_timestamp(
-                os.path.join(profile_data, bench, rate, file_from(k), 'time.json')
+                dataset.json(dataset.profile(bench, rate, k, 'time.json'))
             ) for k in runs]
 
             d = {
@@ -149,5 +122,12 @@ def main():
     plt.savefig(os.path.join(plots_path, 'runtime.pdf'), bbox_inches = 'tight')
     plt.close()
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    args = parser.parse_args()
+
+    report(Dataset(args.work_directory))
+
 if __name__ == '__main__':
     main()
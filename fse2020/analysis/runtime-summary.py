@@ -1,8 +1,8 @@
 #!/usr/bin/python3
 
 import argparse
-import json
 import os
+import sys
 
 from itertools import product
 
@@ -16,6 +16,11 @@ import pandas as pd
 
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
+
+from dataset import Dataset
+from traces import FrameSet
+
 def energy_plot(df):
     ax = df.plot.bar(y = 'mean', yerr = 'std', stacked = True, edgecolor = 'black', width = 0.55, figsize = (16, 9), error_kw = dict(lw = 2, capsize = 10, capthick = 1))
 
@@ -28,110 +33,41 @@ def energy_plot(df):
     plt.xticks(fontsize = 20, rotation = 30)
     plt.yticks(fontsize = 24)
 
-def parse_timestamp(path):
-    ts = np.sort([int(t) for t in json.load(open(path)).values()])
+def parse_timestamp(ts):
+    ts = np.sort([int(t) for t in ts.values()])
     return np.max(ts) - np.min(ts)
 
-_RAPL_WRAPAROUND = 16384
-
-def rapl_wrap_around(reading):
-    if reading >= 0:
-        return reading
-    else:
-        return max(reading + _RAPL_WRAPAROUND, 0)
-
-def parse_energy(path):
-    energy = pd.read_csv(path, delimiter = ';')
-
-    energy.package = energy.groupby('socket').package.diff()
-    energy.dram = energy.groupby('socket').dram.diff()
-
-    energy.package = energy.package.map(rapl_wrap_around)
-    energy.dram = energy.dram.map(rapl_wrap_around)
-    energy = energy.fillna(0)
-
+def parse_energy(energy):
     energy = energy.groupby('socket')[['package', 'dram']].sum()
 
     energy['energy'] = energy.sum(axis = 1)
     return energy.energy
 
-def filter_to_application_(trace):
-    try:
-        while len(trace) > 0:
-            record = trace[0]
-            exclude = False
-            exclude = any((
-                (r'.' not in record),
-                (r'java.' in record and '.java\.' not in record),
-                (r'javax.' in record and '.javax\.' not in record),
-                (r'jdk.' in record and '.jdk\.' not in record),
-                (r'sun.' in record and '.sun\.' not in record),
-                (r'org.apache.commons.' in record and '.org.apache.commons\.' not in record),
-                (r'<init>' in record),
-                (r'.so' in record),
-                (r'::' in record),
-                (r'[' in record),
-                (r']' in record)
-            ))
-            if not exclude:
-                return trace
-            else:
-                trace.pop(0)
-    except:
-        pass
-
-    return 'end'
-
-def filter_to_application(df):
-    mask = (df.trace == 'end') | df.trace.str.contains('chappie') | df.trace.str.contains('jlibc') | df.trace.str.contains('jrapl')
-    df = df[~mask]
-    df.trace = df.trace.str.split('@').map(filter_to_application_)
-    method = df.trace.str[0]
-    df = df[(df.trace != 'end') & (method != 'e') & ~(method.str.contains('org.dacapo.harness'))]
-
-    return df
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('-work-directory')
-    args = parser.parse_args()
-
-    data_path = args.work_directory
-    plots_path = os.path.join(data_path, 'plots')
-    if not os.path.exists(plots_path):
-        os.mkdir(plots_path)
+def report(dataset):
+    plots_path = dataset.plots()
 
-    calm_data = os.path.join(data_path, 'calmness', 'calm')
-    profile_data = os.path.join(data_path, 'calmness', 'profile')
-    profiling_data = os.path.join(data_path, 'profiling')
-    file_from = lambda k: os.path.join('raw', str(k))
-
-    benchs = np.sort(os.listdir(calm_data))
-    benchs = tqdm(benchs)
+    benchs = tqdm(dataset.benchmarks())
 
     summary = []
     energy = []
 
     for bench in benchs:
         benchs.set_description(bench)
-        runs = np.sort(os.listdir(os.path.join(calm_data, bench, 'raw')))
-        runs = runs[(len(runs) // 5):]
+        runs = dataset.runs(bench)
+        batches = dataset.batches(bench)
 
-        ts = np.mean([parse_timestamp(os.path.join(calm_data, bench, 'raw', str(k), 'time.json')) / 1000000000 for k in runs])
-        total_threads = len(json.load(open(os.path.join(profiling_data, bench, '0', 'raw', '0', 'id.json'))))
+        ts = np.mean([parse_timestamp(dataset.json(dataset.calm(bench, k, 'time.json'))) / 1000000000 for k in runs])
+        total_threads = len(dataset.json(dataset.profiling(bench, 0, 0, 'id.json')))
         live_threads = np.mean([
-            pd.read_csv(os.path.join(
-                profiling_data, bench, n, 'raw', str(k), 'vm.csv'
-            ), delimiter = ';').groupby('epoch').id.count().mean() for n, k in product(
-                os.listdir(os.path.join(profiling_data, bench)), runs
-        )])
-
-        methods = [pd.read_csv(os.path.join(
-            profiling_data, bench, n, 'raw', str(k), 'method.csv'
-        ), delimiter = ';').trace.str.split('@').tolist() for n, k in product(
-            os.listdir(os.path.join(profiling_data, bench)), runs
-        )]
-        methods = len({m for iter in methods for stack in iter for m in stack})
+            dataset.table(
+                dataset.profiling(bench, n, k, 'vm.csv')
+            ).groupby('epoch').id.count().mean() for n, k in product(batches, runs)
+        ])
+
+        methods = FrameSet()
+        for n, k in product(batches, runs):
+            methods.add(dataset.table(dataset.profiling(bench, n, k, 'method.csv')).trace)
+        methods = methods.count()
 
         s = pd.Series(
             index = ['bench', 'methods', 'total threads', 'active threads', 'execution time(s)'],
@@ -141,7 +77,7 @@ def main():
         summary.append(s)
 
         df = pd.concat([
-            pd.read_csv(os.path.join(profiling_data, bench, i, 'summary', 'component.csv')).assign(i = i) for i in os.listdir(os.path.join(profiling_data, bench))
+            dataset.summary(bench, i, 'component').assign(i = i) for i in batches
         ]).groupby(['socket', 'i']).sum().groupby('socket').agg(('mean', 'std')).stack(0).reset_index()
         df.columns = ['socket', 'component', 'mean', 'std']
         df['bench'] = bench
@@ -166,6 +102,12 @@ def main():
     plt.savefig(os.path.join(plots_path, 'energy.pdf'), bbox_inches = 'tight')
     plt.close()
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    args = parser.parse_args()
+
+    report(Dataset(args.work_directory))
 
 if __name__ == '__main__':
     main()
@@ -1,59 +1,29 @@
 #!/usr/bin/python3
 
 import argparse
-import json
 import os
+import sys
+
+from functools import partial
+from multiprocessing import Pool
 
 import numpy as np
 import pandas as pd
 
 from tqdm import tqdm
 
-def parse_timestamp(path):
-    ts = np.sort([int(t) for t in json.load(open(path)).values()])
-    return (np.max(ts) - np.min(ts)) / 100000000000
-
-def parse_runtime(path, runs):
-    t = [parse_timestamp(path(run)) for run in runs]
-    return {'mean': np.mean(t), 'std': np.std(t)}
-
-def parse_freqs(path, runs):
-    df = pd.concat([pd.read_csv(path(run), delimiter = ';').assign(run = int(run)) for run in runs])
-    df.freq /= 10000
-    df.freq = df.freq.astype(int)
-
-    df.epoch = df.epoch * df.epoch.max() / df.groupby('run').epoch.max().mean()
-    df.epoch = df.epoch.round(0).astype(int)
-
-    return df
-
-def time_calmness(t, ref):
-    return {
-        'mean': (t['mean'] - ref['mean']) / ref['mean'],
-        'std': np.sqrt((t['mean'] * t['std'])**2 + (ref['mean'] * ref['std'])**2)
-    }
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
 
-def create_bins(s, n):
-    iqr = s.quantile(0.75) - s.quantile(0.25)
-    if iqr > 0:
-        d = s.max() - s.min()
-        size = int(d * np.cbrt(n) / iqr / 2)
-    else:
-        size = 21
-
-    if size > 21:
-        size = 21
-
-    return np.linspace(s.min() - 0.01, s.max() + 0.01, size + 1)
+from calmness import evaluate
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-d', '--data-directory')
+    parser.add_argument('-j', '--jobs', type = int, default = 1)
     args = parser.parse_args()
 
     calm_data = os.path.join(args.data_directory, 'calmness', 'calm')
     profile_data = os.path.join(args.data_directory, 'calmness', 'profile')
-    file_from = lambda k: os.path.join('raw', str(k))
 
     bench_sizes = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'experiment-sizes.txt'), delimiter = ' ', header = None)
     bench_sizes.columns = ['bench', 'sizes']
@@ -61,67 +31,18 @@ def main():
 
     benchs = np.sort(os.listdir(calm_data))
 
+    # each benchmark's reference is loaded once and all of its rates are checked against it
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            results = pool.map(partial(evaluate, calm_data, profile_data), benchs)
+    else:
+        results = [evaluate(calm_data, profile_data, bench) for bench in tqdm(benchs)]
+
     df = []
-    for bench in benchs:
+    for bench, result in zip(benchs, results):
         idx = ('benchmark', 'size', 'rate', 'runtime', 'runtime_std', 'temporal', 'temporal_err', 'temporal_rms', 'spatial', 'spatial_err', 'spatial_rms')
-
-        runs = np.sort(os.listdir(os.path.join(calm_data, bench, 'raw')))
-        runs = runs[(len(runs) // 5):]
-
-        time_files = lambda run: os.path.join(calm_data, bench, file_from(run), 'time.json')
-        temporal_files = lambda run: os.path.join(calm_data, bench, file_from(run), 'freqs.csv')
-
-        t_ref = parse_runtime(time_files, runs)
-        f_ref = parse_freqs(temporal_files, runs)
-
-        for rate in os.listdir(os.path.join(profile_data, bench)):
-            time_files = lambda run: os.path.join(profile_data, bench, rate, file_from(run), 'time.json')
-            temporal_files = lambda run: os.path.join(profile_data, bench, rate, file_from(run), 'cpu.csv')
-
-            t = time_calmness(parse_runtime(time_files, runs), t_ref)
-
-            ref = f_ref.copy(deep = True)
-            f = parse_freqs(temporal_files, runs)
-            f.epoch = f.epoch * ref.epoch.max() / f.groupby('run').epoch.max().mean()
-            f.epoch = f.epoch.round(0).astype(int)
-
-            merged_data = pd.concat([f, ref], sort = False)
-            bins = create_bins(merged_data.freq, len(merged_data))
-            if len(bins) > 1:
-                f.freq = pd.cut(f.freq, bins = bins)
-                f = f.groupby(['epoch', 'freq']).cpu.count()
-                f = f / f.groupby('epoch').sum()
-
-                ref.freq = pd.cut(ref.freq, bins = bins)
-                ref = ref.groupby(['epoch', 'freq']).cpu.count()
-                ref = ref / ref.groupby('epoch').sum()
-            elif len(bins) == 1:
-                f = f.groupby(['epoch']).cpu.count()
-                ref = ref.groupby(['epoch']).cpu.count()
-
-            tc = {'corr': f.corr(ref)}
-            tc['err'] = np.sqrt((1 - tc['corr'] ** 2) / (len(f) - 2))
-            tc['rms'] = np.sqrt(((f.min() - f.max())**2).sum() / len(f))
-
-            merged_data = pd.concat([f, ref], sort = False)
-            bins = create_bins(merged_data, len(merged_data))
-            f = f.to_frame().reset_index()
-            ref = ref.to_frame().reset_index()
-            if len(bins) > 1:
-                f.cpu = pd.cut(f.cpu, bins = bins, include_lowest = True)
-                f = f.groupby(['freq', 'cpu']).epoch.count()
-
-                ref['cpu'] = pd.cut(ref['cpu'], bins = bins, include_lowest = True)
-                ref = ref.groupby(['freq', 'cpu']).epoch.count()
-            elif len(bins) == 1:
-                f = f.groupby(['freq']).cpu.count()
-                ref = ref.groupby(['freq']).cpu.count()
-
-            sc = {'corr': f.corr(ref)}
-            sc['err'] = np.sqrt((1 - sc['corr'] ** 2) / (len(f) - 2))
-            sc['rms'] = np.sqrt(((f.min() - f.max())**2).sum() / len(f))
-
-            df.append(pd.Series(index = idx, data = (bench, bench_sizes[bench], int(rate), t['mean'], t['std'], tc['corr'], tc['err'], tc['rms'], sc['corr'], sc['err'], sc['rms'])))
+        for rate, record in result:
+            df.append(pd.Series(index = idx, data = [bench, bench_sizes[bench], int(rate)] + [record[col] for col in idx[3:]]))
 
     plots_path = os.path.join(args.data_directory, 'plots')
     if not os.path.exists(plots_path):
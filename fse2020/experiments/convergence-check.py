@@ -2,10 +2,14 @@
 
 import argparse
 import os
+import sys
 
-import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'src', 'python', 'analysis'))
+
+from convergence import Tracker
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-d', '--data-directory')
@@ -13,23 +17,19 @@ def main():
 
     method_file = lambda batch: os.path.join(args.data_directory, batch, 'summary', 'method.csv')
 
-    batches = np.sort(os.listdir(args.data_directory))
-    ranking = pd.concat([pd.read_csv(method_file(batch)).assign(batch = int(batch)) for batch in batches])
-
-    ranking['method'] = ranking.trace.str.split(';').str[0]
-    ranking = ranking.groupby(['method', 'batch']).energy.sum()
-    ranking = ranking.reset_index()
+    batches = sorted([batch for batch in os.listdir(args.data_directory) if batch.isdigit()], key = int)
+    versions = {batch: os.path.getmtime(method_file(batch)) for batch in batches}
 
-    df = pd.concat([
-        ranking[ranking.batch < (len(batches) - 1)].assign(g = 0),
-        ranking.assign(g = 1)
-    ])
-    df = df.groupby(['method', 'g']).energy.sum()
-    df = df.unstack()
-    df = df / df.sum()
+    # only the batches that came in since the last check get read
+    tracker = Tracker.load(args.data_directory)
+    if tracker.outdated(versions):
+        tracker = Tracker()
+    for batch in batches:
+        if batch not in tracker.batches:
+            tracker.update(batch, pd.read_csv(method_file(batch)), versions[batch])
+    tracker.dump(args.data_directory)
 
-    corr = df.corr().loc[0, 1]
-    print(corr)
+    print(tracker.correlation)
 
 if __name__ == '__main__':
     main()
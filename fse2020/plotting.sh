@@ -3,6 +3,4 @@
 dir=`dirname "$0"`
 
 work_dir=$1
-for script in $dir/analysis/*; do
-  python3 $script -work-directory $work_dir
-done
+python3 $dir/report.py -work-directory $work_dir
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+import argparse
+import importlib.util
+import os
+import sys
+import traceback
+
+from fnmatch import fnmatch
+
+import matplotlib
+matplotlib.use('Agg')
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'src', 'python', 'analysis'))
+
+from dataset import Dataset
+
+REPORTS = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'analysis')
+
+def reports(select = None):
+    names = [script[:-3] for script in sorted(os.listdir(REPORTS)) if script.endswith('.py')]
+    if select:
+        names = [name for name in names if any(fnmatch(name, pattern) for pattern in select)]
+
+    return names
+
+def load_report(name):
+    # the reports have dashes in their names, so they're loaded from their files
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(REPORTS, name + '.py'))
+    report = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(report)
+
+    return report
+
+def run(work_directory, select = None, cache_size = 2048):
+    # every report reads through the same dataset, so anything two of them look at is only
+    # parsed once while it fits in cache_size (MiB); like plotting.sh used to, one failing
+    # doesn't stop the others
+    dataset = Dataset(work_directory, cache_size << 20)
+
+    failed = []
+    for name in reports(select):
+        try:
+            load_report(name).report(dataset)
+        except Exception:
+            traceback.print_exc()
+            failed.append(name)
+
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-work-directory')
+    parser.add_argument('-r', '--reports', nargs = '+', help = 'glob patterns of the reports to run')
+    parser.add_argument('--cache-size', type = int, default = 2048, help = 'MiB of tables to keep between reports')
+    args = parser.parse_args()
+
+    failed = run(args.work_directory, args.reports, args.cache_size)
+    if failed:
+        print('failed: {}'.format(', '.join(failed)))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -56,10 +56,9 @@ public class FreqProfiler extends Profiler {
   }
 
   public void sampleImpl(int epoch) {
-    // for (long freq: CPU.getFreqs())
-    for (int i = 0; i < 40; i++) {
-      long freq = CPU.getFreq(i);
-      data.add(new FreqRecord(epoch, i, freq));
+    long[] freqs = CPU.getFreqs();
+    for (int i = 0; i < freqs.length; i++) {
+      data.add(new FreqRecord(epoch, i, freqs[i]));
     }
   }
 
@@ -21,6 +21,7 @@ package chappie.profile.impl;
 
 import java.io.IOException;
 import java.util.ArrayList;
+import java.util.HashMap;
 
 import chappie.Chaperone;
 import chappie.profile.*;
@@ -107,5 +108,10 @@ public class OSProfiler extends Profiler {
     JSON.write(Task.getTaskIds(), Chaperone.getWorkDirectory() + "/tid.json");
     JSON.write(Task.getTaskNames(), Chaperone.getWorkDirectory() + "/name.json");
     JSON.write(CPU.getMaxFreqs(), Chaperone.getWorkDirectory() + "/freqs.json");
+
+    // without a topology the analysis falls back to the legacy socket layout
+    HashMap<Integer, Integer> sockets = CPU.getSockets();
+    if (sockets != null)
+      JSON.write(sockets, Chaperone.getWorkDirectory() + "/topology.json");
   }
 }
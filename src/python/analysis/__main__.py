@@ -5,16 +5,24 @@ import warnings
 warnings.simplefilter('ignore')
 
 from argparse import Namespace
+from functools import partial
+from multiprocessing import Pool
 from os.path import dirname
 
-import pandas as pd
-
-from numpy.random import randint
 from tqdm import tqdm
 
 import attribution as attr
+import manifest
 import summary as smry
 import plotting as plt
+import timings
+
+from lazy import module
+
+# these pull in pandas, which most runs that are already up to date never need
+columnar = module('columnar')
+pd = module('pandas')
+rollup = module('rollup')
 
 run_libs = dirname(__file__)
 chappie_root = dirname(run_libs)
@@ -23,43 +31,120 @@ def parse_args():
     parser = argparse.ArgumentParser()
 
     parser.add_argument('-dir', '--work-directory')
+    parser.add_argument('-j', '--jobs', type = int, default = 1)
+    parser.add_argument('-f', '--force', action = 'store_true')
+    parser.add_argument('-w', '--window', type = int, default = 0)
+    parser.add_argument('-a', '--alignment', choices = ('bucket', 'interval'), default = 'bucket',
+        help = 'keep one trace sample per thread and 0.5 ms bucket, or split each epoch over all of them')
+    parser.add_argument('-l', '--limit', type = int, default = 0,
+        help = 'give energy without a trace to the nearest sample of its thread up to this many 0.5 ms buckets away; -1 for any distance')
+    parser.add_argument('-t', '--timings', action = 'store_true')
+    parser.add_argument('--plots', nargs = '+')
+    parser.add_argument('--skip-plots', nargs = '+')
+    parser.add_argument('--method-precision', type = int, help = 'estimate the sampled methods with a 2^p register sketch instead of counting them exactly')
 
     args = parser.parse_args()
 
     if os.path.exists(os.path.join(args.work_directory, 'config.json')):
         config = json.load(open(os.path.join(args.work_directory, 'config.json')))
         config['work_directory'] = args.work_directory
+        config['jobs'] = args.jobs
+        config['force'] = args.force
+        config['window'] = args.window
+        config['alignment'] = args.alignment
+        config['limit'] = args.limit if args.limit >= 0 else None
+        config['timings'] = args.timings
+        config['plots'] = args.plots
+        config['skip_plots'] = args.skip_plots
+        config['method_precision'] = args.method_precision
     else:
         raise ValueError('no config found!')
 
+    if args.window > 0 and args.alignment == 'interval':
+        raise ValueError('interval alignment needs the whole run; drop --window')
+    if args.window > 0 and args.limit != 0:
+        raise ValueError('gap filling needs the whole run; drop --window')
+
     return config
 
-def process_iteration(work_directory):
-    energy = attr.attribute(work_directory)
+def process_iteration(work_directory, f, status = None, window = 0, alignment = 'bucket', limit = 0):
+    raw_root = os.path.join(work_directory, 'raw')
+    processed_root = os.path.join(work_directory, 'processed')
+    raw_path = os.path.join(raw_root, f)
+
+    # every stage label doubles as a timing boundary
+    status = timings.Stages(status)
 
-    energy = energy.reset_index()
-    energy = energy[energy.id > 0].set_index(['timestamp', 'id'])
+    if not os.path.exists(os.path.join(raw_path, 'method.csv')):
+        from attribution.processing.energy import process as prc
+        df = prc(pd.read_csv(os.path.join(raw_path, 'energy.csv'), delimiter = ';'))
+        df = df.groupby('socket')[['package', 'dram']].sum()
+        df.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+
+        df = df.groupby('epoch')[['energy']].sum()
+        timestamps = {int(k) + 1: int(v) for k, v in json.load(open(os.path.join(raw_path, 'time.json'))).items()}
+        df['timestamp'] = df.index.map(timestamps)
+        df = df.diff().fillna(0)
+        df.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)), index = False)
+        return f, status.dump()
 
     timestamps = json.load(open(os.path.join(raw_root, f, 'time.json')))
     timestamps = {int(k): int(v) for k, v in timestamps.items()}
     start, end = min(timestamps.values()), max(timestamps.values())
 
-    id = json.load(open(os.path.join(work_directory, 'id.json')))
+    id = json.load(open(os.path.join(raw_path, 'id.json')))
+
+    # windowed runs never hold a whole table, so they go straight from the raw csvs to the outputs
+    if window > 0:
+        status.set_description('stream')
+        energy = attr.streaming.attribute(raw_path, window, status)
+        energy = attr.streaming.write(energy, os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+        energy = (df[df.index.get_level_values('id') > 0] for df in energy)
+
+        methods = attr.streaming.read_methods(os.path.join(raw_path, 'method.csv'), start, end)
+        for df in attr.streaming.write(attr.streaming.align(energy, methods, id), os.path.join(processed_root, 'method', '{}.csv'.format(f))):
+            pass
+
+        # buckets straddle the windows, so the rollups are made from the finished table
+        status.set_description('rollup')
+        rollup.write(columnar.read_table(os.path.join(processed_root, 'energy', '{}.csv'.format(f)), delimiter = ','), processed_root, f)
+
+        return f, status.dump()
+
+    if status:
+        status.set_description('cache')
+    columnar.convert(raw_path)
+
+    # the interval join puts samples on the energy's buckets, so both have to start at the same one
+    origin = start // attr.BUCKET if alignment == 'interval' else None
+    energy = attr.attribute(raw_path, status, origin)
+    status.set_description('write')
+    columnar.write_table(energy, os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+
+    status.set_description('rollup')
+    rollup.write(energy, processed_root, f)
+
+    energy = energy.reset_index()
+    energy = energy[energy.id > 0].set_index(['timestamp', 'id'])
 
-    if raw_method is not None:
-        trimmed_method = raw_method[(raw_method.timestamp >= start) & (raw_method.timestamp <= end)].copy()
-        trimmed_method['timestamp'] = trimmed_method.timestamp - start + 1
-        trimmed_method = trimmed_method.set_index(['timestamp', 'id'])
-        trimmed_method.to_csv('method_{}.csv'.format(f))
+    status.set_description('method')
+    method = columnar.read_table(os.path.join(raw_path, 'method.csv'))
+    if alignment == 'interval':
+        method = attr.interval_methods(method, start, end).sort_index()
     else:
-        trimmed_method = pd.DataFrame(index = energy.index)
-        trimmed_method['trace'] = randint(0, 26, len(trimmed_method)) + 65
-        trimmed_method.trace = trimmed_method.trace.map(chr)
+        method = attr.bucket_methods(method, start, end).sort_index()
+    status.rows(len(method))
+
+    df = attr.align(energy, method, id, limit = limit, status = status, join = alignment)
+    status.set_description('write')
+    columnar.write_table(df, os.path.join(processed_root, 'method', '{}.csv'.format(f)))
+
+    return f, status.dump()
 
-    df = attr.align(energy, trimmed_method, id, limit = 0, status = status)
-    df.to_csv(os.path.join(processed_root, 'method', '{}.csv'.format(f)))
+def processing_options(window = 0, alignment = 'bucket', limit = 0):
+    return {'window': window, 'alignment': alignment, 'limit': limit}
 
-def processing(work_directory):
+def pending(work_directory, force = False, options = None):
     raw_root = os.path.join(work_directory, 'raw')
     processed_root = os.path.join(work_directory, 'processed')
     if not os.path.exists(processed_root):
@@ -71,81 +156,140 @@ def processing(work_directory):
     warm_up = len(iters) // 5
     iters = iters[warm_up:]
 
-    status = tqdm(iters)
+    # the workers share these directories so they have to exist up front
+    if not os.path.exists(os.path.join(processed_root, 'energy')):
+        os.mkdir(os.path.join(processed_root, 'energy'))
 
-    for f in status:
-        raw_path = os.path.join(raw_root, f)
-        if not os.path.exists(os.path.join(processed_root, 'energy')):
-            os.mkdir(os.path.join(processed_root, 'energy'))
+    if any(os.path.exists(os.path.join(raw_root, f, 'method.csv')) for f in iters):
+        if not os.path.exists(os.path.join(processed_root, 'method')):
+            os.mkdir(os.path.join(processed_root, 'method'))
 
-        if not os.path.exists(os.path.join(raw_path, 'method.csv')):
-            from attribution.processing.energy import process as prc
-            df = prc(pd.read_csv(os.path.join(raw_path, 'energy.csv'), delimiter = ';'))
-            df = df.groupby('socket')[['package', 'dram']].sum()
-            df.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+    # skip anything whose raw inputs and options match the last run and whose outputs are still around
+    previous = manifest.load(processed_root) if not force else {}
+    current = {f: manifest.describe(os.path.join(raw_root, f), previous.get(f), options) for f in iters}
 
-            df = df.groupby('epoch')[['energy']].sum()
-            timestamps = {int(k) + 1: int(v) for k, v in json.load(open(os.path.join(raw_path, 'time.json'))).items()}
-            df['timestamp'] = df.index.map(timestamps)
-            df = df.diff().fillna(0)
-            df.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)), index = False)
-            continue
+    outputs = lambda f: [os.path.join(processed_root, 'energy', '{}.csv'.format(f))] + (
+        [
+            os.path.join(processed_root, 'method', '{}.csv'.format(f)),
+            os.path.join(rollup.level_path(processed_root, 'thread', rollup.LEVELS[-1]), '{}.csv'.format(f))
+        ]
+        if os.path.exists(os.path.join(raw_root, f, 'method.csv')) else []
+    )
+    iters = [f for f in iters if not (
+        manifest.unchanged(previous.get(f), current[f]) and all(os.path.exists(out) for out in outputs(f))
+    )]
 
-        if not os.path.exists(os.path.join(processed_root, 'method')):
-            os.mkdir(os.path.join(processed_root, 'method'))
+    return iters, current
 
-        energy = attr.attribute(raw_path, status)
-        energy.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+def record(work_directory, current, stages):
+    processed_root = os.path.join(work_directory, 'processed')
+    manifest.dump(current, processed_root)
+
+    # iterations that were skipped keep whatever they recorded last time
+    recorded = timings.load(processed_root)
+    recorded['iterations'].update(stages)
+    timings.dump(recorded, processed_root)
+
+def processing(work_directory, jobs = 1, force = False, window = 0, alignment = 'bucket', limit = 0):
+    iters, current = pending(work_directory, force, processing_options(window, alignment, limit))
+
+    if jobs > 1 and len(iters) > 1:
+        # each iteration is independent so we only need to report the finished ones
+        with Pool(min(jobs, len(iters))) as pool:
+            status = tqdm(
+                pool.imap_unordered(partial(process_iteration, work_directory, window = window, alignment = alignment, limit = limit), iters),
+                total = len(iters)
+            )
+            status.set_description('process')
+            stages = dict(status)
+    else:
+        status = tqdm(iters)
+        stages = dict(process_iteration(work_directory, f, status, window, alignment, limit) for f in status)
 
-        energy = energy.reset_index()
-        energy = energy[energy.id > 0].set_index(['timestamp', 'id'])
+    record(work_directory, current, stages)
 
-        timestamps = json.load(open(os.path.join(raw_root, f, 'time.json')))
-        timestamps = {int(k): int(v) for k, v in timestamps.items()}
-        start, end = min(timestamps.values()), max(timestamps.values())
+    return iters
 
-        id = json.load(open(os.path.join(raw_path, 'id.json')))
+def summary_options(config):
+    return {option: config.get(option) for option in ('method_precision', 'plots', 'skip_plots')}
 
-        if os.path.exists(os.path.join(raw_path, 'method.csv')):
-            method = pd.read_csv(os.path.join(raw_path, 'method.csv'), delimiter = ';')
-            method.timestamp = method.timestamp - start + 1
-            method.timestamp = method.timestamp // (1000 * 500)
-            method = method[(method.timestamp > 0) & (method.timestamp <= (end // (1000 * 500))) & (method.epoch > -1)]
-            method = method.drop_duplicates(['timestamp', 'id']).set_index(['timestamp', 'id']).sort_index()
+def summarized(work_directory, options):
+    # the summary and plots are only up to date if they were made with the same options
+    processed_root = os.path.join(work_directory, 'processed')
+    summary_root = os.path.join(work_directory, 'summary')
+
+    return os.path.exists(os.path.join(summary_root, 'method.csv')) and manifest.load(processed_root, manifest.SUMMARY) == options
 
-        df = attr.align(energy, method, id, limit = 0, status = status)
-        df.to_csv(os.path.join(processed_root, 'method', '{}.csv'.format(f)))
+def record_summary(work_directory, options):
+    manifest.dump(options, os.path.join(work_directory, 'processed'), manifest.SUMMARY)
 
-def summary(work_directory):
+def summary(work_directory, status = None, precision = None):
     processed_root = os.path.join(work_directory, 'processed')
     summary_root = os.path.join(work_directory, 'summary')
     if not os.path.exists(summary_root):
         os.mkdir(summary_root)
 
-    runtime = smry.runtime(work_directory)
+    if status:
+        status.set_description('runtime')
+    runtime = smry.runtime(work_directory, precision)
     runtime.to_csv(os.path.join(summary_root, 'runtime.csv'), header = True)
 
-    component = smry.component(os.path.join(processed_root, 'energy'))
+    # per-iteration partial sums so only new iterations get folded in
+    cache_root = os.path.join(processed_root, 'summary')
+    for cache in (cache_root, os.path.join(cache_root, 'component'), os.path.join(cache_root, 'method')):
+        if not os.path.exists(cache):
+            os.mkdir(cache)
+
+    if status:
+        status.set_description('component')
+    # the component split only needs totals, so it reads the coarsest rollup there is
+    energy_root, _ = rollup.source(processed_root, 'thread', iters = [f for f in os.listdir(os.path.join(processed_root, 'energy')) if '.csv' in f])
+    component = smry.component(energy_root, os.path.join(cache_root, 'component'))
     component.to_csv(os.path.join(summary_root, 'component.csv'))
 
-    method = smry.method(os.path.join(processed_root, 'method'))
+    if status:
+        status.set_description('method')
+    method = smry.method(os.path.join(processed_root, 'method'), os.path.join(cache_root, 'method'))
     method.to_csv(os.path.join(summary_root, 'method.csv'))
 
-def plotting(work_directory):
+    return method
+
+def plotting(work_directory, status = None, queue = None):
+    if status:
+        status.set_description('plotting')
     summary_root = os.path.join(work_directory, 'summary')
     plots_root = os.path.join(work_directory, 'plots')
     if not os.path.exists(plots_root):
         os.mkdir(plots_root)
 
-    correlation = plt.correlation(summary_root)
-    ranking = plt.ranking(summary_root)
-    cfa = plt.cfa(summary_root)
+    correlation = plt.correlation(summary_root, queue)
+    ranking = plt.ranking(summary_root, queue)
+    cfa = plt.cfa(summary_root, queue)
     cfa.to_csv(os.path.join(summary_root, 'cfa2.csv'))
 
 def main(config):
-    processing(config['work_directory'])
-    summary(config['work_directory'])
-    plotting(config['work_directory'])
+    updated = processing(config['work_directory'], config.get('jobs', 1), config.get('force', False), config.get('window', 0), config.get('alignment', 'bucket'), config.get('limit', 0))
+
+    processed_root = os.path.join(config['work_directory'], 'processed')
+    options = summary_options(config)
+    if len(updated) == 0 and summarized(config['work_directory'], options) and not config.get('force', False):
+        print('no new iterations; summary and plots are up to date')
+    else:
+        status = timings.Stages()
+        summary(config['work_directory'], status, config.get('method_precision'))
+
+        # figures render in their own processes while the rest of the plotting data is worked out
+        with plt.RenderQueue(config.get('jobs', 1), config.get('plots'), config.get('skip_plots')) as queue:
+            plotting(config['work_directory'], status, queue)
+
+        record_summary(config['work_directory'], options)
+
+        recorded = timings.load(processed_root)
+        recorded['summary'] = status.dump()
+        timings.dump(recorded, processed_root)
+
+    if config.get('timings', False):
+        print(timings.table(timings.load(processed_root)).round(3).to_string())
 
 if __name__ == "__main__":
     main(parse_args())
@@ -1,3 +1,10 @@
-from attribution.attribution import attribute
+from lazy import exports
 
-from attribution.alignment import align
+exports(__name__, {
+    'attribute': ('attribution.attribution', 'attribute'),
+    'align': ('attribution.alignment', 'align'),
+    'bucket_methods': ('attribution.alignment', 'bucket_methods'),
+    'interval_methods': ('attribution.alignment', 'interval_methods'),
+    'BUCKET': ('attribution.alignment', 'BUCKET'),
+    'streaming': ('attribution.streaming', None),
+})
@@ -1,73 +1,170 @@
+import numpy as np
 import pandas as pd
 
-def smooth_energy_trace(df):
-    id = df.index.unique()[0]
-    idx = pd.RangeIndex(df.timestamp.min(), df.timestamp.max())
-    df = df.set_index('timestamp').reindex(idx)
-    df.loc[df.package == df.package, 'tag'] = df.index[df.package == df.package]
-    df = df.bfill()
-
-    # get size of each group
-    tag_size = df.groupby('tag').count()
-
-    # smooth data by division with group size
-    df = pd.merge(df, tag_size, on = 'tag', right_index = True, how = 'outer', suffixes = ('', '_'))
-    df.package /= df.package_
-    df.dram /= df.dram_
-
-    if not df.empty:
-        df = df.reset_index()
-        df['timestamp'] = df['index']
-        df['id'] = id
-    else:
-        df['timestamp'] = None
+from timings import rows
 
-    return df.set_index('timestamp')[['package', 'dram']]
+# trace samples and epochs meet on 0.5 ms buckets
+BUCKET = 1000 * 500
 
-def align_methods(attributed, method):
-    attributed = attributed.reset_index().dropna(subset = ['timestamp']).groupby('id').apply(smooth_energy_trace)
-    attributed = attributed.reset_index().set_index(['timestamp', 'id']).sort_index()
+def expand(start, size):
+    offset = np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size)
+    return np.repeat(start, size) + offset
 
-    method = method['trace']
+def smooth_energy_traces(df):
+    df = df.sort_values(['id', 'timestamp'])
 
-    trace = attributed.join(method)
-    return trace
+    id = df.id.values
+    timestamp = df.timestamp.values.astype(np.int64)
+    package = df.package.values.astype(float)
+    dram = df.dram.values.astype(float)
 
-def fill_methods(df, limit = None):
-    trace_map = df.set_index('timestamp').to_dict()['trace']
+    # each thread's trace runs from its first timestamp up to (but not including) its last one
+    bounds = df.groupby('id').timestamp.agg(('min', 'max')).astype(np.int64)
+    lo = df.id.map(bounds['min']).values
+    hi = df.id.map(bounds['max']).values
 
-    if limit != 0:
-        df.loc[df.trace == df.trace, 'tag'] = df.timestamp[df.trace == df.trace]
+    # every sample is spread evenly over the gap back to the previous sample
+    sampled = (package == package) & (timestamp < hi)
+    id, timestamp, lo = id[sampled], timestamp[sampled], lo[sampled]
+    package, dram = package[sampled], dram[sampled]
 
-        df['next'] = df.tag.bfill(limit = limit)
-        df['prev'] = df.tag.ffill(limit = limit)
+    first = np.r_[True, id[1:] != id[:-1]]
+    start = np.where(first, lo, np.r_[0, timestamp[:-1]] + 1)
+    size = timestamp - start + 1
 
-        df = df.dropna(subset = ['next', 'prev'], how = 'all')
+    # whatever is left between the last sample and the end of the trace has no energy
+    last = pd.Series(timestamp, index = id).groupby(level = 0).max()
+    tail_start = (bounds['max'].index.map(last).values + 1)
+    tail_start = np.where(tail_start == tail_start, tail_start, bounds['min'].values).astype(np.int64)
+    tail_size = np.maximum(bounds['max'].values - tail_start, 0)
 
-        next_dist = abs(df.next - df.index)
-        prev_dist = abs(df.prev - df.index)
-        mask = ((next_dist == next_dist) & (prev_dist != prev_dist)) | (next_dist < prev_dist)
+    df = pd.DataFrame({
+        'timestamp': np.r_[expand(start, size), expand(tail_start, tail_size)],
+        'id': np.r_[np.repeat(id, size), np.repeat(bounds.index.values, tail_size)],
+        'package': np.r_[np.repeat(package / size, size), np.full(tail_size.sum(), np.nan)],
+        'dram': np.r_[np.repeat(dram / size, size), np.full(tail_size.sum(), np.nan)],
+    })
 
-        df.loc[mask, 'timestamp'] = df[mask].next
-        df.loc[~mask, 'timestamp'] = df[~mask].prev
-    else:
-        df = df.dropna()
+    return df.set_index(['timestamp', 'id']).sort_index()
+
+def bucket_methods(method, start, end):
+    method.timestamp = method.timestamp - start + 1
+    method.timestamp = method.timestamp // BUCKET
+    method = method[(method.timestamp > 0) & (method.timestamp <= (end // BUCKET)) & (method.epoch > -1)]
+
+    return method.drop_duplicates(['timestamp', 'id']).set_index(['timestamp', 'id'])
 
-    df = df.groupby('timestamp')[['package', 'dram']].sum().reset_index()
-    df.timestamp = df.timestamp.astype(int)
-    df['trace'] = df.timestamp.map(trace_map)
+def interval_methods(method, start, end):
+    # every sample is kept, bucketed the way the energy is when its origin is start's bucket
+    method = method[(method.timestamp >= start) & (method.timestamp <= end) & (method.epoch > -1)]
+    method = method.assign(timestamp = method.timestamp // BUCKET - start // BUCKET + 1)
 
-    return df.set_index('timestamp')[['trace', 'package', 'dram']]
+    return method.set_index(['timestamp', 'id'])[['trace']]
 
-def align(attributed, method, id, limit = None, status = None):
+def align_methods(attributed, method):
+    attributed = smooth_energy_traces(attributed.reset_index().dropna(subset = ['timestamp']))
+
+    method = method['trace']
+
+    trace = attributed.join(method)
+    return trace
+
+def thread_keys(*columns):
+    # folds (thread, timestamp) pairs into one integer that sorts by thread and then by time,
+    # the same way for every pair of columns given, so one searchsorted covers every thread
+    timestamps = [timestamp for _, timestamp in columns if len(timestamp) > 0]
+    offset = min(timestamp.min() for timestamp in timestamps) if timestamps else 0
+    span = max(timestamp.max() for timestamp in timestamps) - offset + 2 if timestamps else 1
+
+    return [id.astype(np.int64) * span + timestamp.astype(np.int64) - offset for id, timestamp in columns]
+
+def interval_join(attributed, method):
+    attributed = attributed.reset_index().dropna(subset = ['timestamp']).sort_values(['id', 'timestamp'])
+    method = method.reset_index()
+    if attributed.empty or method.empty:
+        return pd.DataFrame(columns = ['timestamp', 'id', 'package', 'dram', 'trace']).set_index(['timestamp', 'id'])
+
+    id = attributed.id.values.astype(np.int64)
+    timestamp = attributed.timestamp.values.astype(np.int64)
+    sample_id = method.id.values.astype(np.int64)
+    sample_timestamp = method.timestamp.values.astype(np.int64)
+
+    # a thread's row covers everything since its previous row; its first one reaches back to the
+    # epoch before it, or just its own bucket if it's in the first epoch
+    epochs = np.unique(timestamp)
+    before = np.searchsorted(epochs, timestamp) - 1
+    first = np.r_[True, id[1:] != id[:-1]]
+    lower = np.where(first, np.where(before >= 0, epochs[np.maximum(before, 0)], timestamp - 1), np.r_[0, timestamp[:-1]])
+
+    key, sample_key = thread_keys((id, timestamp), (sample_id, sample_timestamp))
+    row = np.searchsorted(key, sample_key, side = 'left')
+    found = row < len(id)
+    row = np.minimum(row, len(id) - 1)
+    found &= (id[row] == sample_id) & (sample_timestamp > lower[row])
+    row = row[found]
+
+    # the row's energy is split evenly over all of the thread's samples in it; rows nothing
+    # landed in come along without a trace for fill_methods
+    share = np.bincount(row, minlength = len(id))
+    orphan = share == 0
+    df = pd.DataFrame({
+        'timestamp': np.r_[sample_timestamp[found], timestamp[orphan]],
+        'id': np.r_[sample_id[found], id[orphan]],
+        'package': np.r_[attributed.package.values[row] / share[row], attributed.package.values[orphan]],
+        'dram': np.r_[attributed.dram.values[row] / share[row], attributed.dram.values[orphan]],
+        'trace': np.r_[method.trace.values[found], np.full(orphan.sum(), np.nan, dtype = object)],
+    })
+
+    return df.set_index(['timestamp', 'id']).sort_index()
+
+def fill_methods(df, limit = 0):
+    # energy without a trace goes to the nearest traced slice of the same thread that's at most
+    # limit buckets away (the earlier one on a tie); the default drops it like the bucket join
+    # always did and a limit of None reaches across the whole thread
+    df = df.dropna(subset = ['package', 'dram']).reset_index()
+    traced = (df.trace == df.trace).values
+    sampled = df[traced].sort_values(['id', 'timestamp'], kind = 'mergesort')
+    if limit == 0 or len(sampled) == len(df) or sampled.empty:
+        return sampled.sort_values(['timestamp', 'id'], kind = 'mergesort').set_index(['timestamp', 'id'])
+
+    orphans = df[~traced]
+    id, timestamp = sampled.id.values, sampled.timestamp.values.astype(np.int64)
+    orphan_id, orphan_timestamp = orphans.id.values, orphans.timestamp.values.astype(np.int64)
+    key, orphan_key = thread_keys((id, timestamp), (orphan_id, orphan_timestamp))
+
+    following = np.searchsorted(key, orphan_key)
+    previous = np.maximum(following - 1, 0)
+    following = np.minimum(following, len(key) - 1)
+
+    before = np.where((orphan_key > key[previous]) & (id[previous] == orphan_id), orphan_timestamp - timestamp[previous], np.inf)
+    after = np.where((orphan_key <= key[following]) & (id[following] == orphan_id), timestamp[following] - orphan_timestamp, np.inf)
+    nearest = np.where(after < before, following, previous)
+    distance = np.minimum(before, after)
+
+    filled = distance <= limit if limit is not None else np.isfinite(distance)
+    nearest = nearest[filled]
+
+    sampled = sampled.assign(
+        package = sampled.package.values + np.bincount(nearest, weights = orphans.package.values[filled], minlength = len(sampled)),
+        dram = sampled.dram.values + np.bincount(nearest, weights = orphans.dram.values[filled], minlength = len(sampled)),
+    )
+
+    return sampled.sort_values(['timestamp', 'id'], kind = 'mergesort').set_index(['timestamp', 'id'])
+
+def align(attributed, method, id, limit = 0, status = None, join = 'bucket'):
     if status:
         status.set_description('align {}'.format(limit if limit is not None else 'inf'))
-    aligned = align_methods(attributed, method)
+    if join == 'interval':
+        aligned = interval_join(attributed, method)
+    else:
+        aligned = align_methods(attributed, method)
+    rows(status, len(aligned))
 
     if status:
-        status.set_description('smooth {}'.format(limit if limit is not None else 'inf'))
-    aligned = aligned.dropna().reset_index()
+        status.set_description('fill {}'.format(limit if limit is not None else 'inf'))
+    aligned = fill_methods(aligned, limit).reset_index()
     id = {int(k): v for k, v in id.items()}
     aligned['name'] = aligned.id.map(id)
+    rows(status, len(aligned))
 
     return aligned.set_index(['timestamp', 'id', 'name'])
@@ -8,27 +8,32 @@ from itertools import product
 import pandas as pd
 
 from attribution.processing import jvm, jiffies, energy, state
+from columnar import read_table
+from timings import rows
 
-def attribute(path, status = None):
-    if status:
-        status.set_description('load')
+def load(path):
     file_path = lambda f: os.path.join(path, f)
 
     raw = {
         file.split(r'.')[0]:
-            pd.read_csv(file_path(file), delimiter = ';').sort_values('epoch')
+            read_table(file_path(file)).sort_values('epoch')
             if 'csv' in file and 'method' not in file else
             json.load(open(file_path(file))) if 'method' not in file else ''
-        for file in os.listdir(path)
+        for file in os.listdir(path) if os.path.isfile(file_path(file))
     }
 
+    return raw
+
+def attribute_tables(raw, status = None, epochs = None, origin = None):
     if status:
         status.set_description('jvm  ')
     vm = jvm.process(raw['vm'], raw['id'], raw['tid'], raw['chappie'])
+    rows(status, len(vm))
 
     if status:
         status.set_description('jiff ')
-    jiff = jiffies.process(raw['task'], raw['name'], raw['cpu'])
+    jiff = jiffies.process(raw['task'], raw['name'], raw['cpu'], raw.get('main'), raw.get('topology'))
+    rows(status, len(jiff))
 
     if status:
         status.set_description('nrg  ')
@@ -38,17 +43,18 @@ def attribute(path, status = None):
         print('no energy data; creating dummy data')
         dummy_epochs = vm.reset_index().epoch.unique()
         dummy_index = pd.MultiIndex.from_product(
-            [dummy_epochs, (1, 2)],
+            [dummy_epochs, sorted(jiff.socket.unique())],
             names = ['epoch', 'socket']
         )
 
         nrg = pd.DataFrame(index = dummy_index)
         nrg['package'] = 1
         nrg['dram'] = 1
+    rows(status, len(nrg))
 
     if status:
         status.set_description('attr ')
-    attributed = state.align(vm, jiff, nrg, raw['time']).reset_index()
+    attributed = state.align(vm, jiff, nrg, raw['time'], epochs, origin).reset_index()
 
     raw['id'] = {int(k): v for k, v in raw['id'].items()}
     raw['name'] = {int(k): v for k, v in raw['name'].items()}
@@ -57,5 +63,14 @@ def attribute(path, status = None):
     # added this for the async mapping
     attributed['id'] = attributed.tid
     attributed = attributed.drop_duplicates(subset = ['timestamp', 'id'])
+    rows(status, len(attributed))
 
     return attributed.set_index(['timestamp', 'id', 'name'])
+
+def attribute(path, status = None, origin = None):
+    if status:
+        status.set_description('load')
+    raw = load(path)
+    rows(status, sum(len(table) for table in raw.values() if isinstance(table, pd.DataFrame)))
+
+    return attribute_tables(raw, status, origin = origin)
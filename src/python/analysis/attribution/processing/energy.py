@@ -1,20 +1,7 @@
-_RAPL_WRAPAROUND = 16384
-
-def rapl_wrap_around(reading):
-    if reading >= 0:
-        return reading
-    else:
-        return max(reading + _RAPL_WRAPAROUND, 0)
+from rapl import deltas
 
 def process(energy):
     # shouldn't this have been handled at runtime???
     energy.socket += 1
 
-    energy.package = energy.groupby('socket').package.diff()
-    energy.dram = energy.groupby('socket').dram.diff()
-
-    energy.package = energy.package.map(rapl_wrap_around)
-    energy.dram = energy.dram.map(rapl_wrap_around)
-    energy = energy.fillna(0)
-
-    return energy.set_index(['epoch', 'socket'])
+    return deltas(energy).set_index(['epoch', 'socket'])
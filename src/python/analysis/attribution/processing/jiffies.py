@@ -1,15 +1,20 @@
 import numpy as np
 import pandas as pd
 
-def process_app(jiff, name):
+from topology import socket_table, sockets
+
+def process_app(jiff, name, main = None, table = None):
     name = {int(k): v for k, v in name.items()}
 
     jiff['os_name'] = jiff.tid.map(name).fillna("").astype(str)
-    mask = jiff.tid == jiff[jiff.os_name == 'java'].tid.max()
+    if main is None:
+        main = jiff[jiff.os_name == 'java'].tid.max()
+    mask = jiff.tid == main
     jiff.loc[mask, 'os_name'] = 'main'
 
-    jiff.loc[jiff['cpu'] < 20, 'socket'] = 1
-    jiff.loc[jiff['cpu'] >= 20, 'socket'] = 2
+    if table is None:
+        table = socket_table(cpus = jiff.cpu.max() + 1)
+    jiff['socket'] = sockets(jiff.cpu.values, table)
 
     jiff = jiff.sort_values(['epoch', 'tid'])
 
@@ -18,37 +23,33 @@ def process_app(jiff, name):
 
     return jiff.set_index(['epoch', 'tid', 'os_name'])[['socket', 'jiffies']]
 
-def process_sys(jiff):
+def process_sys(jiff, table = None):
     jiff = jiff.drop(columns = 'idle')
     jiff['jiffies'] = jiff[[col for col in jiff.columns if col not in ('epoch', 'cpu')]].sum(axis = 1)
 
-    jiff.loc[jiff['cpu'] < 20, 'socket'] = 1
-    jiff.loc[jiff['cpu'] >= 20, 'socket'] = 2
+    if table is None:
+        table = socket_table(cpus = jiff.cpu.max() + 1)
+    jiff['socket'] = sockets(jiff.cpu.values, table)
 
     jiff['jiffies'] = jiff.groupby('cpu').jiffies.diff().fillna(0).astype(int)
 
     return jiff.set_index(['epoch', 'socket'])[['jiffies']]
 
 def jiffies_smoothing(df):
-    app = sys = 0
-    records = []
-    i = 0
-    for epoch, socket, app_jiff, sys_jiff in df[['epoch', 'socket', 'app', 'sys']].values:
-        app += app_jiff
-        sys += sys_jiff
-        i += 1
-        if (app > 0 and app <= sys) or i % 10:
-            records.append([epoch, socket, min(int(app), int(sys)), sys])
-            app = sys = 0
-            i = 0
-
-    grp = pd.DataFrame(data = records, columns = ['epoch', 'socket', 'app', 'sys']).set_index(['epoch', 'socket'])
-    grp['jiffies'] = (grp.app / grp.sys).fillna(1).replace(np.inf, 1).clip(0, 1)
-
-    df = pd.concat([df.set_index(['epoch', 'socket']), grp], axis = 1).bfill().fillna(0)
+    # the old accumulating loop flushed on every sample (i % 10 is non-zero right after
+    # a reset), so this is just the per-epoch ratio of app jiffies to sys jiffies
+    app = np.trunc(df.app.values.astype(float))
+    sys = df.sys.values.astype(float)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        jiffies = np.minimum(app, np.trunc(sys)) / sys
+    jiffies[np.isnan(jiffies) | (jiffies == np.inf)] = 1
+    jiffies = jiffies.clip(0, 1)
+
+    df = df.assign(jiffies = jiffies)
     df = df[df.jiffies > 0]
 
-    return df.reset_index()[['epoch', 'jiffies']]
+    return df.reset_index(drop = True)[['epoch', 'jiffies']]
 
 def align(app, sys):
     jiff = pd.concat([
@@ -63,9 +64,11 @@ def align(app, sys):
 
     return jiff.set_index(['epoch', 'tid', 'os_name'])[['socket', 'jiffies']]
 
-def process(app, name, sys):
-    app = process_app(app, name)
-    sys = process_sys(sys)
+def process(app, name, sys, main = None, topology = None):
+    # one lookup for both tables, big enough for every cpu either of them saw
+    table = socket_table(topology, max(app.cpu.max(), sys.cpu.max()) + 1)
+    app = process_app(app, name, main, table)
+    sys = process_sys(sys, table)
     jiff = align(app, sys)
 
     return jiff
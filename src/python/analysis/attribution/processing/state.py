@@ -1,42 +1,45 @@
 import pandas as pd
 
-def align_by_tid(vm, jiff):
-    vm = vm.reset_index().set_index(['epoch', 'tid'])
-    jiff = jiff.reset_index().set_index(['epoch', 'tid'])
-
-    df = pd.concat([vm, jiff], axis = 1).sort_index().reset_index()
-    df.jiffies = df.groupby('tid').jiffies.bfill()
-    df.socket = df.groupby('tid').socket.bfill()
-    df.id = df.groupby('tid').id.bfill().fillna(-1)
-    df.tid = df.groupby('tid').tid.bfill()
-    df.activeness = df.groupby('tid').activeness.bfill().fillna(1)
-
+def next_sample(df, samples, columns):
+    # picks up each row's values from the first sample of the same tid at or after its epoch
+    return pd.merge_asof(
+        df.sort_values('epoch'),
+        samples[['epoch', 'tid'] + columns].sort_values('epoch'),
+        on = 'epoch',
+        by = 'tid',
+        direction = 'forward'
+    )
+
+def finish(df):
     df = df[df.jiffies == df.jiffies]
 
+    df.id = df.id.fillna(-1).astype(int)
+    df.activeness = df.activeness.fillna(1)
     df.socket = df.socket.astype(int)
-    df.id = df.id.astype(int)
     df.tid = df.tid.astype(int)
 
     return df.set_index(['epoch', 'id', 'tid'])[['socket', 'activeness', 'jiffies']]
 
-def align_by_name(vm, jiff):
+def align_by_tid(vm, jiff):
     vm = vm.reset_index()
     jiff = jiff.reset_index()
 
-    df = pd.merge(vm, jiff, on = ('epoch', 'os_name'), how = 'outer', suffixes = ('_', ''))
-    df.jiffies = df.groupby('tid').jiffies.bfill()
-    df.socket = df.groupby('tid').socket.bfill()
-    df.id = df.groupby('tid').id.bfill().fillna(-1)
-    df.tid = df.groupby('tid').tid.bfill()
-    df.activeness = df.groupby('tid').activeness.bfill().fillna(1)
+    # every vm or jiffies sample takes the next jiffies sample and the next vm sample of its tid
+    df = pd.concat([vm[['epoch', 'tid']], jiff[['epoch', 'tid']]]).drop_duplicates()
+    df = next_sample(df, jiff, ['socket', 'jiffies'])
+    df = next_sample(df, vm, ['id', 'activeness'])
 
-    df = df[df.jiffies == df.jiffies]
+    return finish(df)
 
-    df.socket = df.socket.astype(int)
-    df.id = df.id.astype(int)
-    df.tid = df.tid.astype(int)
+def align_by_name(vm, jiff):
+    vm = vm.reset_index()
+    jiff = jiff.reset_index()
 
-    return df.set_index(['epoch', 'id', 'tid'])[['socket', 'activeness', 'jiffies']]
+    # jiffies samples only pick up a vm sample with the same name in the same epoch; the outer
+    # merge this replaces put the unmatched ones after every match, so its backfill never reached them
+    df = pd.merge(jiff, vm[['epoch', 'os_name', 'id', 'activeness']], on = ['epoch', 'os_name'], how = 'left')
+
+    return finish(df)
 
 def align_state(vm, jiff):
     vm = vm
@@ -73,15 +76,19 @@ def align_energy(state, energy):
 
     return df.set_index(['epoch', 'id', 'tid'])[['socket', 'package', 'dram']].sort_index()
 
-def align(vm, jiff, energy, timestamps):
+def align(vm, jiff, energy, timestamps, epochs = None, origin = None):
     timestamps = {int(k): int(v) // (1000 * 500) for k, v in timestamps.items()}
 
     state = align_state(vm, jiff)
+    # a streamed window only owns [start, end); anything later was just there to backfill from
+    if epochs is not None:
+        epoch = state.index.get_level_values('epoch')
+        state = state[(epoch >= epochs[0]) & (epoch < epochs[1])]
     attributed = align_energy(state, energy)
 
     attributed = attributed.reset_index()
     attributed['timestamp'] = attributed.epoch.map(timestamps)
-    attributed['timestamp'] -= attributed['timestamp'].min()
+    attributed['timestamp'] -= attributed['timestamp'].min() if origin is None else origin
     attributed['timestamp'] += 1
 
     return attributed.set_index(['timestamp', 'id', 'tid'])[['socket', 'package', 'dram']]
@@ -0,0 +1,189 @@
+import json
+import os
+
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from attribution.alignment import bucket_methods, smooth_energy_traces
+from attribution.attribution import attribute_tables
+
+TABLES = ('vm', 'task', 'cpu', 'energy')
+# these are differenced per key, so the last row of each key has to survive into the next window
+CARRY = {'task': 'tid', 'cpu': 'cpu', 'energy': 'socket'}
+
+def read_windows(path, window, chunksize = 1 << 16):
+    # the profilers write in epoch order, so a window is complete once a later epoch shows up
+    pending = None
+    for chunk in pd.read_csv(path, delimiter = ';', chunksize = chunksize):
+        pending = chunk if pending is None else pd.concat([pending, chunk])
+        key = pending.epoch.values // window
+        done = key < key.max()
+        for k, df in pending[done].groupby(key[done]):
+            yield k, df
+        pending = pending[~done]
+
+    if pending is not None:
+        for k, df in pending.groupby(pending.epoch.values // window):
+            yield k, df
+
+class WindowReader:
+    def __init__(self, path, window):
+        self.windows = read_windows(path, window) if os.path.exists(path) else iter(())
+        self.head = next(self.windows, None)
+
+    def pop(self, k):
+        # windows are asked for in order, so anything before k is stale and a gap is just empty
+        while self.head is not None and self.head[0] < k:
+            self.head = next(self.windows, None)
+
+        if self.head is not None and self.head[0] == k:
+            df = self.head[1]
+            self.head = next(self.windows, None)
+            return df
+
+    def done(self):
+        return self.head is None
+
+def main_tid(path, name, chunksize = 1 << 16):
+    # the main thread is the highest java tid over the whole run, not just over one window
+    tids = set()
+    for chunk in pd.read_csv(path, delimiter = ';', usecols = ['tid'], chunksize = chunksize):
+        tids.update(chunk.tid.unique())
+
+    java = [tid for tid in tids if name.get(str(tid)) == 'java']
+    return max(java) if java else np.nan
+
+def attribute(path, window, status = None):
+    file_path = lambda f: os.path.join(path, f)
+
+    # the maps and chappie's own trace are a row per thread or epoch, so they are loaded whole
+    raw = {
+        file.split(r'.')[0]: json.load(open(file_path(file)))
+        for file in os.listdir(path) if file.endswith('.json')
+    }
+    chappie = pd.read_csv(file_path('chappie.csv'), delimiter = ';').sort_values('epoch')
+    main = main_tid(file_path('task.csv'), raw['name'])
+    names = {int(k): v for k, v in raw['id'].items()}
+    time = {int(k): v for k, v in raw['time'].items()}
+
+    readers = {table: WindowReader(file_path('{}.csv'.format(table)), window) for table in TABLES}
+    heads = [reader.head[0] for reader in readers.values() if reader.head is not None]
+    if not heads:
+        return
+
+    k = min(heads)
+    current = {table: reader.pop(k) for table, reader in readers.items()}
+
+    carry = {}
+    offset = 0
+    origin = None
+    seen = None
+    while True:
+        # the next window is read ahead so the backfills in state.align can see past the boundary;
+        # that only matches a full load if no thread goes a whole window without a sample
+        ahead = {table: reader.pop(k + 1) for table, reader in readers.items()}
+        if all(df is None for df in chain(current.values(), ahead.values())) and all(reader.done() for reader in readers.values()):
+            break
+
+        frames = {
+            table: pd.concat([df for df in (carry.get(table), current[table], ahead[table]) if df is not None]).sort_values('epoch')
+            for table in TABLES if any(df is not None for df in (carry.get(table), current[table], ahead[table]))
+        }
+
+        if current['vm'] is not None and current['task'] is not None:
+            tables = dict(raw, chappie = chappie.iloc[offset:], main = main, **frames)
+            tables['time'] = {e: time[e] for e in range(k * window, (k + 2) * window) if e in time}
+
+            attributed = attribute_tables(tables, status, (k * window, (k + 1) * window), 0).reset_index()
+            # whatever runs downstream of this window is billed to the stream itself
+            if status:
+                status.set_description('stream')
+
+            if len(attributed) > 0:
+                if origin is None:
+                    origin = attributed.timestamp.min() - 1
+                attributed.timestamp -= origin
+
+                # two epochs can share a bucket across the boundary
+                if seen is not None:
+                    attributed = attributed[~pd.MultiIndex.from_arrays([attributed.timestamp, attributed.id]).isin(seen)]
+                last = attributed[attributed.timestamp == attributed.timestamp.max()]
+                seen = pd.MultiIndex.from_arrays([last.timestamp, last.id])
+
+                yield attributed.set_index(['timestamp', 'id', 'name'])
+
+        # chappie's activeness is handed out by position, so skip whatever this window used
+        if current['vm'] is not None:
+            offset += current['vm'].id.map(names).fillna('').astype(str).str.contains('chappie').sum()
+
+        for table, key in CARRY.items():
+            df = [df for df in (carry.get(table), current[table]) if df is not None]
+            if df:
+                carry[table] = pd.concat(df).groupby(key).tail(1)
+
+        current = ahead
+        k += 1
+
+def read_methods(path, start, end, chunksize = 1 << 16):
+    for chunk in pd.read_csv(path, delimiter = ';', chunksize = chunksize):
+        yield bucket_methods(chunk, start, end)[['trace']]
+
+def align(frames, methods, id):
+    id = {int(k): v for k, v in id.items()}
+    methods = iter(methods)
+
+    buffer = None
+    held = None
+    for df in chain(frames, [None]):
+        final = df is None
+        if final and held is None:
+            break
+
+        df = df.reset_index()[['timestamp', 'id', 'package', 'dram']].assign(anchor = False) if not final else None
+        df = pd.concat([d for d in (held, df) if d is not None]).sort_values(['id', 'timestamp'])
+
+        # a thread's samples up to its anchor were settled last window, and everything past its
+        # second to last sample waits for the next one (or the end of the run)
+        floor = df[df.anchor].groupby('id').timestamp.max()
+        traces = smooth_energy_traces(df.drop(columns = 'anchor')).reset_index()
+        keep = traces.timestamp > traces.id.map(floor).fillna(-1)
+        if not final:
+            ceiling = df[df.id.duplicated(keep = 'last')].groupby('id').timestamp.max()
+            keep &= traces.timestamp <= traces.id.map(ceiling)
+        traces = traces[keep]
+
+        held = df.groupby('id').tail(2)
+        held = held.assign(anchor = held.id.duplicated(keep = 'last'))
+
+        if traces.empty:
+            continue
+
+        while buffer is None or buffer.index.get_level_values('timestamp').max() <= traces.timestamp.max():
+            chunk = next(methods, None)
+            if chunk is None:
+                break
+            buffer = pd.concat([buffer, chunk]) if buffer is not None else chunk
+            buffer = buffer[~buffer.index.duplicated(keep = 'first')]
+
+        if buffer is None:
+            continue
+
+        aligned = traces.set_index(['timestamp', 'id']).join(buffer.trace).dropna().reset_index()
+        aligned['name'] = aligned.id.map(id)
+
+        yield aligned.set_index(['timestamp', 'id', 'name']).sort_index()
+
+        # nothing later can land before a thread's anchor, and new threads only start past this window
+        floor = (held.timestamp + held.anchor).groupby(held.id).min()
+        stamp = buffer.index.get_level_values('timestamp')
+        buffer = buffer[stamp >= pd.Series(buffer.index.get_level_values('id')).map(floor).fillna(df.timestamp.max()).values]
+
+def write(frames, path):
+    # each window is appended as soon as it is ready and passed along to whatever comes next
+    header = True
+    for df in frames:
+        df.to_csv(path, mode = 'w' if header else 'a', header = header)
+        header = False
+        yield df
@@ -0,0 +1,166 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset import FILES
+
+MAX_BINS = 21
+
+def parse_timestamp(ts):
+    ts = np.sort([int(t) for t in ts.values()])
+    return (np.max(ts) - np.min(ts)) / 100000000000
+
+def create_bins(values, n):
+    iqr = np.quantile(values, 0.75) - np.quantile(values, 0.25)
+    if iqr > 0:
+        d = values.max() - values.min()
+        size = int(d * np.cbrt(n) / iqr / 2)
+    else:
+        size = MAX_BINS
+
+    if size > MAX_BINS:
+        size = MAX_BINS
+
+    return np.linspace(values.min() - 0.01, values.max() + 0.01, size + 1)
+
+def cut(values, bins, include_lowest = False):
+    # same right-closed intervals as pd.cut, but just the bin numbers
+    codes = np.searchsorted(bins, values, side = 'left') - 1
+    if include_lowest:
+        codes[values == bins[0]] = 0
+
+    return codes
+
+def rescale(epoch, run, epochs):
+    # stretches every run onto the same number of epochs
+    runs, run = np.unique(run, return_inverse = True)
+    last = np.full(len(runs), epoch.min())
+    np.maximum.at(last, run, epoch)
+
+    return np.round(epoch * epochs / last.mean()).astype(int)
+
+class Trace:
+    # the runs of one benchmark at one rate; the samples are only kept as a count of
+    # every integer frequency per epoch, which is all the binning ever looks at
+    def __init__(self, epoch, freq, run, runtime):
+        self.epoch = epoch
+        self.freq = freq
+        self.run = run
+        self.runtime = runtime
+
+        self.counts = None
+        self.cache = {}
+
+    def count(self):
+        if self.counts is None:
+            self.epochs, epoch = np.unique(self.epoch, return_inverse = True)
+            self.values, freq = np.unique(self.freq, return_inverse = True)
+            self.counts = np.bincount(
+                epoch * len(self.values) + freq, minlength = len(self.epochs) * len(self.values)
+            ).reshape(len(self.epochs), len(self.values))
+
+        return self.counts
+
+    @classmethod
+    def load(cls, root, runs, file, files = FILES):
+        tables = [files.table(os.path.join(root, 'raw', run, file)) for run in runs]
+        durations = [parse_timestamp(files.json(os.path.join(root, 'raw', run, 'time.json'))) for run in runs]
+
+        epoch = np.concatenate([df.epoch.values for df in tables])
+        run = np.concatenate([np.full(len(df), int(r)) for r, df in zip(runs, tables)])
+        freq = np.trunc(np.concatenate([df.freq.values for df in tables]) / 10000).astype(int)
+
+        return cls(rescale(epoch, run, epoch.max()), freq, run, {'mean': np.mean(durations), 'std': np.std(durations)})
+
+    def align(self, reference):
+        # puts this trace on the reference's epochs
+        return Trace(rescale(self.epoch, self.run, reference.epoch.max()), self.freq, self.run, self.runtime)
+
+    def temporal(self, bins):
+        # fraction of each epoch's samples in each frequency bin
+        key = bins.tobytes()
+        if key not in self.cache:
+            self.count()
+            if len(bins) > 1:
+                onehot = np.zeros((len(self.values), len(bins) - 1))
+                onehot[np.arange(len(self.values)), cut(self.values, bins)] = 1
+                counts = self.counts @ onehot
+                self.cache[key] = counts / counts.sum(axis = 1)[:, None]
+            else:
+                self.cache[key] = self.counts.sum(axis = 1)[:, None].astype(float)
+
+        return self.cache[key]
+
+def correspondence(x, y, n):
+    # pearson over the pairs that line up, with the error of all n values
+    valid = ~(np.isnan(x) | np.isnan(y))
+    corr = np.corrcoef(x[valid], y[valid])[0, 1] if valid.sum() > 1 else np.nan
+
+    return corr, np.sqrt((1 - corr ** 2) / (n - 2))
+
+def spatial(temporal, bins):
+    # how many epochs have each fraction of their samples in each frequency bin
+    if len(bins) > 1:
+        codes = cut(temporal, bins, include_lowest = True) + (len(bins) - 1) * np.arange(temporal.shape[1])
+        return np.bincount(codes.ravel(), minlength = temporal.shape[1] * (len(bins) - 1)).reshape(temporal.shape[1], len(bins) - 1)
+    else:
+        return np.full((temporal.shape[1], 1), len(temporal))
+
+def time_calmness(t, ref):
+    return {
+        'mean': (t['mean'] - ref['mean']) / ref['mean'],
+        'std': np.sqrt((t['mean'] * t['std'])**2 + (ref['mean'] * ref['std'])**2)
+    }
+
+def compare(trace, reference, series = False):
+    # every distribution the reference is binned into is kept, so rates that end up
+    # with the same bins only bin the reference once
+    record = {}
+    t = time_calmness(trace.runtime, reference.runtime)
+    record['runtime'], record['runtime_std'] = t['mean'], t['std']
+
+    freq_bins = create_bins(np.r_[trace.freq, reference.freq], len(trace.freq) + len(reference.freq))
+    f, ref = trace.temporal(freq_bins), reference.temporal(freq_bins)
+
+    _, i, j = np.intersect1d(trace.epochs, reference.epochs, return_indices = True)
+    record['temporal'], record['temporal_err'] = correspondence(f[i].ravel(), ref[j].ravel(), f.size)
+    record['temporal_rms'] = np.sqrt((f.min() - f.max()) ** 2 / f.size)
+
+    cpu_bins = create_bins(np.r_[f.ravel(), ref.ravel()], f.size + ref.size)
+    fs, refs = spatial(f, cpu_bins), spatial(ref, cpu_bins)
+
+    record['spatial'], record['spatial_err'] = correspondence(fs.ravel().astype(float), refs.ravel().astype(float), fs.size)
+    record['spatial_rms'] = np.sqrt((fs.min() - fs.max()) ** 2 / fs.size)
+
+    if not series:
+        return record
+
+    # the plots want the same shape of series the pandas version made
+    freqs = pd.cut(freq_bins[1:], freq_bins).categories if len(freq_bins) > 1 else pd.Index([0])
+    cpus = pd.cut(cpu_bins[1:], cpu_bins, include_lowest = True).categories if len(cpu_bins) > 1 else pd.Index([0])
+    temporal_series = lambda epochs, df: pd.Series(df.ravel(), index = pd.MultiIndex.from_product([epochs, freqs], names = ['epoch', 'freq']), name = 'cpu')
+    spatial_series = lambda df: pd.Series(df.ravel(), index = pd.MultiIndex.from_product([freqs, cpus], names = ['freq', 'cpu']), name = 'epoch')
+
+    return record, {
+        'temporal': temporal_series(trace.epochs, f),
+        'spatial': spatial_series(fs),
+        'temporal_reference': temporal_series(reference.epochs, ref),
+        'spatial_reference': spatial_series(refs)
+    }
+
+def runs(root):
+    runs = np.sort(os.listdir(os.path.join(root, 'raw')))
+    return runs[(len(runs) // 5):]
+
+def evaluate(calm_root, profile_root, bench, series = False, files = FILES):
+    # the reference is loaded once and every rate is compared against it
+    calm_runs = runs(os.path.join(calm_root, bench))
+    reference = Trace.load(os.path.join(calm_root, bench), calm_runs, 'freqs.csv', files)
+
+    results = []
+    for rate in os.listdir(os.path.join(profile_root, bench)):
+        trace = Trace.load(os.path.join(profile_root, bench, rate), calm_runs, 'cpu.csv', files).align(reference)
+        results.append((rate, compare(trace, reference, series)))
+
+    return results
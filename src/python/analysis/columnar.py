@@ -0,0 +1,83 @@
+import argparse
+import os
+
+import pandas as pd
+
+# feather needs pyarrow; without it everything just keeps reading the csvs
+try:
+    import pyarrow
+    COLUMNAR = True
+except ImportError:
+    COLUMNAR = False
+
+CACHE = '.cache'
+
+CATEGORICAL = ('state', 'name', 'trace')
+INTEGRAL = ('epoch', 'timestamp', 'id', 'tid', 'cpu', 'socket')
+
+def cache_path(path):
+    root, file = os.path.split(path)
+    return os.path.join(root, CACHE, os.path.splitext(file)[0] + '.feather')
+
+def is_cached(path):
+    cached = cache_path(path)
+    return COLUMNAR and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path)
+
+def to_columnar(df):
+    # the caller keeps using its frame, so the conversions go on a copy
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL:
+            df[col] = df[col].astype('category')
+        elif col in INTEGRAL and df[col].dtype.kind == 'f' and df[col].notna().all():
+            df[col] = df[col].astype(int)
+
+    return df.reset_index(drop = True)
+
+def write_cache(df, path):
+    if not COLUMNAR:
+        return
+
+    if not os.path.exists(os.path.dirname(cache_path(path))):
+        os.makedirs(os.path.dirname(cache_path(path)), exist_ok = True)
+    to_columnar(df).to_feather(cache_path(path))
+
+def read_table(path, delimiter = ';'):
+    if is_cached(path):
+        return pd.read_feather(cache_path(path))
+    else:
+        return pd.read_csv(path, delimiter = delimiter)
+
+def iter_table(path, columns = None, delimiter = ';', chunksize = 1 << 16):
+    # the feather cache is already columnar, so only the asked for columns come off disk
+    if is_cached(path):
+        yield pd.read_feather(cache_path(path), columns = columns)
+    else:
+        yield from pd.read_csv(path, delimiter = delimiter, usecols = columns, chunksize = chunksize)
+
+def write_table(df, path, index = True):
+    df.to_csv(path, index = index)
+    write_cache(df.reset_index() if index else df, path)
+
+def convert(path, delimiter = ';'):
+    if not COLUMNAR:
+        return
+
+    for file in os.listdir(path):
+        file = os.path.join(path, file)
+        if file.endswith('.csv') and not is_cached(file):
+            write_cache(pd.read_csv(file, delimiter = delimiter), file)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('raw_directory', nargs = '+')
+    args = parser.parse_args()
+
+    if not COLUMNAR:
+        raise ImportError('pyarrow is needed to write the columnar cache')
+
+    for path in args.raw_directory:
+        convert(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import json
+import os
+
+import numpy as np
+
+STATE = '.convergence.json'
+
+def method_energy(df):
+    # a method gets the energy of every sample it's on top of
+    return df.assign(method = df.trace.str.split(';').str[0]).groupby('method').energy.sum()
+
+class Tracker:
+    # keeps the running energy of every method and the moments of those sums, so
+    # folding in a batch and correlating the ranking with and without it only
+    # touches the methods that batch sampled
+    def __init__(self, state = None):
+        state = state if state is not None else {}
+
+        self.batches = state.get('batches', {})
+        self.sums = state.get('sums', {})
+        self.moments = state.get('moments', [0, 0.0, 0.0])
+        self.correlation = state.get('correlation', float('nan'))
+
+    @classmethod
+    def load(cls, path):
+        path = os.path.join(path, STATE)
+        if os.path.exists(path):
+            return cls(json.load(open(path)))
+        else:
+            return cls()
+
+    def dump(self, path):
+        json.dump({
+            'batches': self.batches,
+            'sums': self.sums,
+            'moments': self.moments,
+            'correlation': self.correlation
+        }, open(os.path.join(path, STATE), 'w'))
+
+    def outdated(self, versions):
+        # a batch that was folded in and then changed means starting over
+        return any(batch in self.batches and self.batches[batch] != version for batch, version in versions.items())
+
+    def update(self, batch, df, version = None):
+        energy = method_energy(df)
+
+        # the pearson sums of the ranking without the batch (x) and with it (y); the
+        # methods it adds have nothing to compare against so they're left out like
+        # pandas drops the missing pairs
+        n, sx, sxx = self.moments
+        x = np.array([self.sums.get(method, np.nan) for method in energy.index])
+        d = energy.values
+        seen = ~np.isnan(x)
+
+        sy = sx + d[seen].sum()
+        syy = sxx + (2 * x[seen] * d[seen] + d[seen] ** 2).sum()
+        sxy = sxx + (x[seen] * d[seen]).sum()
+
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            self.correlation = float((n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2)))
+
+        for method, value in zip(energy.index, d):
+            self.sums[method] = self.sums.get(method, 0.0) + float(value)
+        self.moments = [int(n + (~seen).sum()), float(sy + d[~seen].sum()), float(syy + (d[~seen] ** 2).sum())]
+        self.batches[batch] = version
+
+        return self.correlation
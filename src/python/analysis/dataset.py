@@ -0,0 +1,123 @@
+import json
+import os
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from columnar import read_table
+from rapl import deltas
+
+class Files:
+    # reads everything straight from disk
+    def table(self, path):
+        return read_table(path)
+
+    def csv(self, path):
+        return pd.read_csv(path)
+
+    def json(self, path):
+        return json.load(open(path))
+
+    def energy(self, path):
+        return deltas(self.table(path))
+
+class Dataset(Files):
+    # an experiment directory as benchmark -> batch -> run -> table. nothing is read until
+    # something asks for it, so the reports share one load. the layout and the json files
+    # are small and kept for good; the tables are kept while they fit in cache_size bytes
+    # and the least recently used go first, so a sweep over every benchmark doesn't hold
+    # them all. what comes back is shared, so callers copy before changing anything in place
+    def __init__(self, root, cache_size = 2 << 30):
+        self.root = root
+        self.calm_root = os.path.join(root, 'calmness', 'calm')
+        self.profile_root = os.path.join(root, 'calmness', 'profile')
+        self.profiling_root = os.path.join(root, 'profiling')
+        self.plots_root = os.path.join(root, 'plots')
+
+        self.cache = {}
+        self.tables = OrderedDict()
+        self.cache_size = cache_size
+        self.size = 0
+
+    def cached(self, key, load):
+        if key not in self.cache:
+            self.cache[key] = load()
+
+        return self.cache[key]
+
+    def held(self, key, load):
+        if key in self.tables:
+            self.tables.move_to_end(key)
+            return self.tables[key][0]
+
+        df = load()
+        size = int(df.memory_usage(deep = True).sum())
+        self.tables[key] = (df, size)
+        self.size += size
+
+        # the newest table stays even if it's bigger than the whole cache
+        while self.size > self.cache_size and len(self.tables) > 1:
+            _, (_, size) = self.tables.popitem(last = False)
+            self.size -= size
+
+        return df
+
+    def table(self, path):
+        return self.held(('table', path), lambda: Files.table(self, path))
+
+    def csv(self, path):
+        return self.held(('csv', path), lambda: Files.csv(self, path))
+
+    def json(self, path):
+        return self.cached(('json', path), lambda: Files.json(self, path))
+
+    def energy(self, path):
+        return self.held(('energy', path), lambda: Files.energy(self, path))
+
+    def benchmarks(self):
+        return self.cached(('benchmarks', ), lambda: np.sort(os.listdir(self.calm_root)))
+
+    def runs(self, bench):
+        # the first fifth of the runs are warm-up
+        runs = self.cached(('runs', bench), lambda: np.sort(os.listdir(os.path.join(self.calm_root, bench, 'raw'))))
+        return runs[(len(runs) // 5):]
+
+    def rates(self, bench):
+        return self.cached(('rates', bench), lambda: os.listdir(os.path.join(self.profile_root, bench)))
+
+    def batches(self, bench):
+        # the convergence state sits next to the batches
+        return self.cached(('batches', bench), lambda: [
+            batch for batch in os.listdir(os.path.join(self.profiling_root, bench)) if batch.isdigit()
+        ])
+
+    def calm(self, bench, run, file):
+        return os.path.join(self.calm_root, bench, 'raw', str(run), file)
+
+    def profile(self, bench, rate, run, file):
+        return os.path.join(self.profile_root, bench, str(rate), 'raw', str(run), file)
+
+    def profiling(self, bench, batch, run, file):
+        return os.path.join(self.profiling_root, bench, str(batch), 'raw', str(run), file)
+
+    def summary(self, bench, batch, name):
+        return self.csv(os.path.join(self.profiling_root, bench, str(batch), 'summary', '{}.csv'.format(name)))
+
+    def calm_rates(self):
+        def load():
+            rates = pd.read_csv(os.path.join(self.root, '.calm-rates'), delimiter = ' ', header = None)
+            rates.columns = ['bench', 'size', 'rate']
+            return rates
+
+        return self.cached(('calm-rates', ), load)
+
+    def plots(self, bench = None):
+        path = self.plots_root if bench is None else os.path.join(self.plots_root, bench)
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        return path
+
+FILES = Files()
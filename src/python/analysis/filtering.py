@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+# a frame is skipped over if it contains the first string unless it also contains the second;
+# the escaped dots never show up in a frame, so those packages are always skipped
+EXCLUDE = (
+    ('java.', '.java\\.'),
+    ('javax.', '.javax\\.'),
+    ('jdk.', '.jdk\\.'),
+    ('sun.', '.sun\\.'),
+    ('org.apache.commons.', '.org.apache.commons\\.'),
+    ('<init>', None),
+    ('.so', None),
+    ('::', None),
+    ('[', None),
+    (']', None),
+)
+# frames without these are native or unnamed
+REQUIRED = ('.', )
+# samples that pass through any of these belong to the profiler
+DROP = ('chappie', 'jlibc', 'jrapl')
+# samples whose application method is one of these are the benchmark harness
+HARNESS = ('org.dacapo.harness', )
+
+class FrameFilter:
+    def __init__(self, exclude = EXCLUDE, required = REQUIRED, drop = DROP, harness = HARNESS, cache_size = 1 << 16):
+        self.exclude = exclude
+        self.required = required
+        self.drop = drop
+        self.harness = harness
+
+        # traces share most of their frames, so every frame is only checked once
+        self.excluded = lru_cache(maxsize = cache_size)(self.is_excluded)
+        self.dropped = lru_cache(maxsize = cache_size)(self.is_dropped)
+
+    def is_excluded(self, frame):
+        return any(pattern not in frame for pattern in self.required) or any(
+            pattern in frame and (unless is None or unless not in frame) for pattern, unless in self.exclude
+        )
+
+    def is_dropped(self, frame):
+        return any(pattern in frame for pattern in self.drop)
+
+    def apply(self, trace):
+        if any(self.dropped(frame) for frame in trace):
+            return None
+
+        for i, frame in enumerate(trace):
+            if not self.excluded(frame):
+                return trace[i:] if not any(pattern in frame for pattern in self.harness) else None
+
+FILTER = FrameFilter()
+
+def filter_to_application(df, sep = '@', frame_filter = FILTER):
+    # each distinct trace is split and filtered once and every sample just looks it up
+    filtered = {trace: frame_filter.apply(trace.split(sep)) for trace in df.trace.dropna().unique()}
+    df = df.assign(trace = df.trace.astype(object).map(filtered))
+
+    return df[df.trace.notna()]
@@ -0,0 +1,44 @@
+import importlib
+import sys
+import types
+
+# pandas, matplotlib and seaborn take a second or more to import, so packages and
+# modules only pull them in once something actually uses them
+
+class Package(types.ModuleType):
+    # names map to (module, attribute), or to (module, None) for the module itself
+    def __getattr__(self, name):
+        names = self.__dict__.get('_exports', {})
+        if name not in names:
+            raise AttributeError('module {!r} has no attribute {!r}'.format(self.__name__, name))
+
+        module, attribute = names[name]
+        value = importlib.import_module(module)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        types.ModuleType.__setattr__(self, name, value)
+
+        return value
+
+    def __setattr__(self, name, value):
+        # importing a submodule binds it on its package, which would hide the function it exports
+        names = self.__dict__.get('_exports', {})
+        if name in names and names[name][1] is not None and isinstance(value, types.ModuleType):
+            return
+        types.ModuleType.__setattr__(self, name, value)
+
+def exports(package, names):
+    package = sys.modules[package]
+    package.__class__ = Package
+    package._exports = names
+
+class Module:
+    # stands in for a module until one of its attributes is used
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def __getattr__(self, attribute):
+        return getattr(importlib.import_module(self._name), attribute)
+
+def module(name):
+    return Module(name)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+
+MANIFEST = 'manifest.json'
+# an iteration's entry also holds the options it was processed with
+OPTIONS = 'options'
+# the options the summary and plots were last made with
+SUMMARY = 'summary-options.json'
+
+def file_hash(path, block_size = 1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def describe(path, previous = None, options = None):
+    previous = previous if previous is not None else {}
+
+    records = {}
+    for file in sorted(os.listdir(path)):
+        if not file.endswith('.csv') and not file.endswith('.json'):
+            continue
+
+        stat = os.stat(os.path.join(path, file))
+        record = {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        # hashing is the expensive part so we trust an untouched file
+        last = previous.get(file, {})
+        if last.get('size') == record['size'] and last.get('mtime') == record['mtime']:
+            record['hash'] = last['hash']
+        else:
+            record['hash'] = file_hash(os.path.join(path, file))
+
+        records[file] = record
+
+    if options is not None:
+        records[OPTIONS] = options
+
+    return records
+
+def unchanged(previous, current):
+    if previous is None or previous.keys() != current.keys():
+        return False
+
+    if previous.get(OPTIONS) != current.get(OPTIONS):
+        return False
+
+    return all(previous[file]['hash'] == current[file]['hash'] for file in current if file != OPTIONS)
+
+def load(processed_root, name = MANIFEST):
+    path = os.path.join(processed_root, name)
+    if os.path.exists(path):
+        return json.load(open(path))
+    else:
+        return {}
+
+def dump(manifest, processed_root, name = MANIFEST):
+    json.dump(manifest, open(os.path.join(processed_root, name), 'w'), indent = 2, sort_keys = True)
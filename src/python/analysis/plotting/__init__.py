@@ -1,3 +1,8 @@
-from plotting.cfa import cfa
-from plotting.correlation import correlation
-from plotting.ranking import ranking
+from lazy import exports
+
+exports(__name__, {
+    'RenderQueue': ('plotting.render', 'RenderQueue'),
+    'cfa': ('plotting.cfa', 'cfa'),
+    'correlation': ('plotting.correlation', 'correlation'),
+    'ranking': ('plotting.ranking', 'ranking'),
+})
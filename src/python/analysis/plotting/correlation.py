@@ -1,5 +1,8 @@
 import os
 
+import matplotlib
+matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
@@ -7,17 +10,9 @@ import seaborn as sns
 
 from tqdm import tqdm
 
-def correlation(path):
-    method = pd.read_csv(os.path.join(path, 'method.csv'))
-
-    method['method'] = method.trace.str.split(';').str[0]
-    # method['method'] = method.trace.str.split('@').str[0]
-    method = method.groupby(['method', 'iter']).energy.sum()
-    method = method.unstack()
-    method /= method.sum()
-
-    method = method.corr()
+from plotting.render import RenderQueue
 
+def render_correlation(method, path):
     plt.figure(figsize = (12, 9))
     ax = sns.heatmap(method, vmin = 0.75, vmax = 1, annot = True, fmt = ".2f", cmap = 'Reds', annot_kws = {'fontsize': 20})
 
@@ -30,7 +25,22 @@ def correlation(path):
     plt.xticks(fontsize = 24)
     plt.yticks(fontsize = 24)
 
-    plt.savefig(os.path.join(path, '..', 'plots', 'auto-corr.pdf'), bbox_inches = 'tight')
+    plt.savefig(path, bbox_inches = 'tight')
     plt.close()
 
+def correlation(path, queue = None):
+    queue = queue if queue is not None else RenderQueue()
+
+    method = pd.read_csv(os.path.join(path, 'method.csv'))
+
+    method['method'] = method.trace.str.split(';').str[0]
+    # method['method'] = method.trace.str.split('@').str[0]
+    method = method.groupby(['method', 'iter']).energy.sum()
+    method = method.unstack()
+    method /= method.sum()
+
+    method = method.corr()
+
+    queue.submit('auto-corr', render_correlation, method, os.path.join(path, '..', 'plots', 'auto-corr.pdf'))
+
     return method
@@ -1,12 +1,54 @@
 import os
 
+import matplotlib
+matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
 from tqdm import tqdm
 
-def ranking(path):
+from plotting.render import RenderQueue
+
+def render_ranking(df_, col, y, c, path):
+    ax = df_.tail(10).plot(
+        kind = 'barh', y = y,
+        width = 0.33, align = 'edge', color = c,
+        figsize = (16, 9)
+    )
+
+    ax.spines['right'].set_visible(False)
+    ax.spines['top'].set_visible(False)
+
+    for rect, name in zip(ax.patches, df_.tail(10).index):
+        height = rect.get_height()
+        ax.text(
+            df_.max().max() * 0.005, rect.get_y() + height + (0.20 if col == 'method' else 0.05),
+            name,
+            ha='left', va='bottom', fontsize = 20
+        )
+
+    if col == 'method':
+        handles, labels = ax.get_legend_handles_labels()
+        ax.legend(handles[::-1], labels[::-1], loc = 'lower right', fontsize = 24)
+    else:
+        ax.get_legend().remove()
+
+    plt.xlim(0, (df_ * 100).apply(np.ceil).energy.max() / 100)
+
+    plt.xlabel('Normalized Value', fontsize = 20)
+    plt.ylabel(col.title(), fontsize = 20)
+
+    plt.yticks([])
+    plt.xticks(fontsize = 16)
+
+    plt.savefig(path, bbox_inches = 'tight')
+    plt.close()
+
+def ranking(path, queue = None):
+    queue = queue if queue is not None else RenderQueue()
+
     method = pd.read_csv(os.path.join(path, 'method.csv')).groupby('trace')[['energy', 'time']].sum().reset_index()
 
     method['method'] = method.trace.str.split(';').str[0]
@@ -35,38 +77,7 @@ def ranking(path):
             c = u'#2ca02c'
             # c = 'tab:green'
 
-        ax = df_.tail(10).plot(
-            kind = 'barh', y = y,
-            width = 0.33, align = 'edge', color = c,
-            figsize = (16, 9)
-        )
-
-        ax.spines['right'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-
-        for rect, name in zip(ax.patches, df_.tail(10).index):
-            height = rect.get_height()
-            ax.text(
-                df_.max().max() * 0.005, rect.get_y() + height + (0.20 if col == 'method' else 0.05),
-                name,
-                ha='left', va='bottom', fontsize = 20
-            )
-
-        if col == 'method':
-            handles, labels = ax.get_legend_handles_labels()
-            ax.legend(handles[::-1], labels[::-1], loc = 'lower right', fontsize = 24)
-        else:
-            ax.get_legend().remove()
-
-        plt.xlim(0, (df_ * 100).apply(np.ceil).energy.max() / 100)
-
-        plt.xlabel('Normalized Value', fontsize = 20)
-        plt.ylabel(col.title(), fontsize = 20)
-
-        plt.yticks([])
-        plt.xticks(fontsize = 16)
-
-        plt.savefig(os.path.join(path, '..', 'plots', '{}_ranking.pdf'.format(col)), bbox_inches = 'tight')
-        plt.close()
+        name = '{}_ranking'.format(col)
+        queue.submit(name, render_ranking, df_, col, y, c, os.path.join(path, '..', 'plots', '{}.pdf'.format(name)))
 
     return rankings.sort_values('energy', ascending = False)
@@ -0,0 +1,53 @@
+import fnmatch
+
+from multiprocessing import Pool
+
+def backend():
+    # figures are only ever written to files; a worker that didn't fork from a process
+    # that already picked the backend would otherwise try an interactive one
+    import matplotlib
+    matplotlib.use('Agg')
+
+class RenderQueue:
+    # figures are handed over with the data they need already prepared, so with
+    # jobs > 1 they render in workers while the next figure's data is worked out
+    def __init__(self, jobs = 1, select = None, skip = None):
+        self.select = select
+        self.skip = skip if skip is not None else []
+        self.pool = Pool(jobs, initializer = backend) if jobs > 1 else None
+        self.pending = []
+
+    def wanted(self, name):
+        return (self.select is None or any(fnmatch.fnmatch(name, pattern) for pattern in self.select)) and not any(
+            fnmatch.fnmatch(name, pattern) for pattern in self.skip
+        )
+
+    def submit(self, name, render, *args):
+        if not self.wanted(name):
+            return
+
+        if self.pool is not None:
+            self.pending.append(self.pool.apply_async(render, args))
+        else:
+            render(*args)
+
+    def wait(self):
+        # anything that failed in a worker is raised here
+        for result in self.pending:
+            result.get()
+        self.pending = []
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if args[0] is not None and self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        else:
+            self.wait()
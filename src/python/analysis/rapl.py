@@ -0,0 +1,22 @@
+import numpy as np
+
+# rapl counters are cumulative joules that roll over at the end of each domain's range
+WRAPAROUND = {'package': 16384, 'dram': 16384}
+DOMAINS = tuple(WRAPAROUND)
+
+def wrap_around(deltas, wraparound = WRAPAROUND['package']):
+    # a negative delta means the counter rolled over; anything still negative after that can't be energy
+    deltas = np.asarray(deltas, dtype = float)
+    return np.where(deltas >= 0, deltas, np.maximum(deltas + wraparound, 0))
+
+def deltas(energy, domains = DOMAINS, by = 'socket', wraparound = WRAPAROUND, reset = None):
+    # turns the cumulative readings of each domain into per-sample energy. if `reset` is given, any
+    # unwrapped delta above it can't be a rollover, so the counter was reset and counted up from zero
+    energy = energy.copy()
+    for domain in domains:
+        delta = wrap_around(energy.groupby(by)[domain].diff().values, wraparound.get(domain, WRAPAROUND['package']))
+        if reset is not None:
+            delta = np.where(delta > reset, energy[domain].values, delta)
+        energy[domain] = delta
+
+    return energy.fillna(0)
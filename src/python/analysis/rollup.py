@@ -0,0 +1,59 @@
+import os
+
+from lazy import module
+
+# up-to-date runs only ask where the rollups go, which shouldn't pull in pandas
+columnar = module('columnar')
+
+# the attributed energy comes in 0.5 ms buckets; each level is built from the one before it
+BUCKET = 0.5
+LEVELS = (1, 10, 100, 1000)
+SCOPES = {
+    'thread': ['timestamp', 'id', 'name', 'socket'],
+    'socket': ['timestamp', 'socket'],
+}
+
+def level_path(processed_root, scope, level):
+    return os.path.join(processed_root, 'rollup', scope, '{}ms'.format(level))
+
+def rollups(energy):
+    # a thread keeps its name so the component split can still be made at any level
+    df = energy.reset_index()
+    df = df.assign(name = df.name.astype(object).fillna(''))[SCOPES['thread'] + ['package', 'dram']]
+
+    previous = BUCKET
+    for level in LEVELS:
+        df = df.assign(timestamp = df.timestamp // int(round(level / previous)))
+        df = df.groupby(SCOPES['thread'])[['package', 'dram']].sum().reset_index()
+        previous = level
+
+        yield 'thread', level, df
+        yield 'socket', level, df.groupby(SCOPES['socket'])[['package', 'dram']].sum().reset_index()
+
+def write(energy, processed_root, f):
+    for scope, level, df in rollups(energy):
+        path = level_path(processed_root, scope, level)
+        if not os.path.exists(path):
+            os.makedirs(path, exist_ok = True)
+        columnar.write_table(df, os.path.join(path, '{}.csv'.format(f)), index = False)
+
+def source(processed_root, scope = 'thread', resolution = None, iters = None):
+    # the coarsest level no coarser than resolution (ms) that has every iteration; the
+    # attributed energy itself answers anything else
+    for level in sorted(LEVELS, reverse = True):
+        if resolution is not None and level > resolution:
+            continue
+
+        path = level_path(processed_root, scope, level)
+        if os.path.exists(path) and (iters is None or all(os.path.exists(os.path.join(path, f)) for f in iters)):
+            return path, level
+
+    return os.path.join(processed_root, 'energy'), BUCKET
+
+def read(processed_root, f, scope = 'thread', resolution = None):
+    path, level = source(processed_root, scope, resolution, ['{}.csv'.format(f)])
+    df = columnar.read_table(os.path.join(path, '{}.csv'.format(f)), delimiter = ',')
+    if level == BUCKET and scope == 'socket':
+        df = df.groupby(SCOPES['socket'])[['package', 'dram']].sum().reset_index()
+
+    return df
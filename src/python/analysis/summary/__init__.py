@@ -1,3 +1,7 @@
-from summary.runtime import runtime
-from summary.component import component
-from summary.method import method
+from lazy import exports
+
+exports(__name__, {
+    'runtime': ('summary.runtime', 'runtime'),
+    'component': ('summary.component', 'component'),
+    'method': ('summary.method', 'method'),
+})
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+class GroupSums:
+    # running sums and counts per group; iterations are added one at a time so
+    # only the groups are held instead of every iteration's rows
+    def __init__(self, keys, values):
+        self.keys = list(keys)
+        self.values = list(values)
+        self.dtypes = None
+
+        self.groups = {}
+        self.sums = np.zeros((0, len(self.values)))
+        self.counts = np.zeros(0, dtype = int)
+
+    def grow(self):
+        # doubles the capacity so adding groups stays amortized linear
+        if len(self.groups) > len(self.counts):
+            size = max(len(self.groups), 2 * len(self.counts))
+            self.sums = np.r_[self.sums, np.zeros((size - len(self.sums), len(self.values)))]
+            self.counts = np.r_[self.counts, np.zeros(size - len(self.counts), dtype = int)]
+
+    def add(self, df):
+        if self.dtypes is None:
+            self.dtypes = df[self.values].dtypes
+
+        df = df.groupby(self.keys, sort = False)[self.values].sum()
+        rows = np.array([self.groups.setdefault(key, len(self.groups)) for key in df.index], dtype = int)
+        self.grow()
+
+        # the groupby leaves every group once, so the rows don't repeat
+        self.sums[rows] += df.values
+        self.counts[rows] += 1
+
+    def frame(self, mean = False):
+        size = len(self.groups)
+        values = self.sums[:size] / self.counts[:size, None] if mean else self.sums[:size]
+
+        if len(self.keys) > 1:
+            index = pd.MultiIndex.from_arrays(list(zip(*self.groups)) or [[]] * len(self.keys), names = self.keys)
+        else:
+            index = pd.Index(list(self.groups), name = self.keys[0])
+        df = pd.DataFrame(values, index = index, columns = self.values)
+        if not mean and self.dtypes is not None:
+            df = df.astype(self.dtypes)
+
+        return df.sort_index()
@@ -0,0 +1,20 @@
+import os
+
+import pandas as pd
+
+from columnar import read_table
+
+def cached(path, f, cache, summarize):
+    source = os.path.join(path, f)
+    if cache is None:
+        return summarize(read_table(source, delimiter = ','))
+
+    # a partial is only good as long as it's newer than what it summarizes
+    target = os.path.join(cache, f)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+        return pd.read_csv(target)
+
+    df = summarize(read_table(source, delimiter = ','))
+    df.to_csv(target, index = False)
+
+    return df
@@ -1,11 +1,16 @@
 import os
 import re
 
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
 from tqdm import tqdm
 
+from summary.aggregate import GroupSums
+from summary.cache import cached
+
 JVM_JAVA = (
     'Common-Cleaner',
     'Finalizer',
@@ -27,34 +32,52 @@ OTHER = (
     'VM Thread'
 )
 
-JVM_C = re.compile('|'.join(JIT + GC + OTHER))
-
-def thread_to_component(thread):
-    if 'chappie' in thread or thread == 'Honest Profiler':
-        return 'chappie'
-    elif thread in JVM_JAVA:
-        return 'jvm-java'
-    elif JVM_C.match(thread) is not None:
-        return 'jvm-c'
-    else:
-        return 'application'
-
-def thread_to_component(thread):
-    if 'chappie' in thread or thread is 'Honest Profiler':
-        return 'chappie'
-    elif thread in JVM_JAVA:
-        return 'jvm-java'
-    elif JVM_C.match(thread) is not None:
-        return 'jvm-c'
-    else:
-        return 'application'
-
-def component(path):
-    iters = np.sort(os.listdir(path))
-    df = pd.concat(tqdm(pd.read_csv(os.path.join(path, f)).assign(iter = k) for k, f in enumerate(iters)))
-
-    df['component'] = df.name.map(thread_to_component)
-    df = df.groupby(['socket', 'component', 'iter'])[['package', 'dram']].sum()
-    df = df.groupby(['socket', 'component'])[['package', 'dram']].mean()
-
-    return df.sort_index()
+JVM_C = '|'.join(JIT + GC + OTHER)
+
+# checked in order with re.match; anything that falls through is the application
+COMPONENTS = (
+    ('chappie', '.*chappie|Honest Profiler$'),
+    ('jvm-java', '({})$'.format('|'.join(re.escape(thread) for thread in JVM_JAVA))),
+    ('jvm-c', JVM_C),
+)
+APPLICATION = 'application'
+
+@lru_cache(maxsize = None)
+def compile_components(components):
+    return tuple((component, re.compile(pattern)) for component, pattern in components)
+
+@lru_cache(maxsize = 1 << 16)
+def thread_to_component(thread, components = COMPONENTS):
+    for component, pattern in compile_components(components):
+        if pattern.match(thread) is not None:
+            return component
+
+    return APPLICATION
+
+def classify(names, components = COMPONENTS):
+    # there are only a handful of distinct thread names, so each one is classified once
+    codes, uniques = pd.factorize(names.astype(object).fillna('').astype(str))
+    categories = list(dict.fromkeys([component for component, _ in components] + [APPLICATION]))
+    component = pd.Categorical.from_codes(
+        [categories.index(thread_to_component(thread, components)) for thread in uniques],
+        categories = categories
+    )
+
+    return pd.Series(component.take(codes), index = names.index)
+
+def component_sums(df):
+    df['component'] = classify(df.name)
+    df = df.groupby(['socket', 'component'], observed = True)[['package', 'dram']].sum().reset_index()
+
+    # the partials are cached as csvs, so they have to sort the same way as when read back
+    return df.assign(component = df.component.astype(str))
+
+def component(path, cache = None):
+    iters = [f for f in np.sort(os.listdir(path)) if '.csv' in f]
+
+    # the mean is over the iterations each component shows up in
+    sums = GroupSums(['socket', 'component'], ['package', 'dram'])
+    for f in tqdm(iters):
+        sums.add(cached(path, f, cache, component_sums))
+
+    return sums.frame(mean = True)
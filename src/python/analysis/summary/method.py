@@ -5,59 +5,50 @@ import pandas as pd
 
 from tqdm import tqdm
 
+from filtering import FILTER
+from summary.aggregate import GroupSums
+from summary.cache import cached
 from summary.component import JVM_JAVA
+from traces import TraceDictionary
 
-def filter_to_application_(trace):
-    try:
-        while len(trace) > 0:
-            record = trace[0]
-            exclude = False
-            exclude = any((
-                (r'.' not in record),
-                (r'java.' in record and '.java\.' not in record),
-                (r'javax.' in record and '.javax\.' not in record),
-                (r'jdk.' in record and '.jdk\.' not in record),
-                (r'sun.' in record and '.sun\.' not in record),
-                (r'org.apache.commons.' in record and '.org.apache.commons\.' not in record),
-                (r'<init>' in record),
-                (r'.so' in record),
-                (r'::' in record),
-                (r'[' in record),
-                (r']' in record)
-            ))
-            if not exclude:
-                return trace
-            else:
-                trace.pop(0)
-    except:
-        pass
-
-    return 'end'
-
-def filter_to_application(df):
-    mask = (df.trace == 'end') | df.trace.str.contains('chappie') | df.trace.str.contains('jlibc') | df.trace.str.contains('jrapl') | df.name.isin(JVM_JAVA)
-    df = df[~mask]
-    df.trace = df.trace.str.split('@').map(filter_to_application_)
-    method = df.trace.str[0]
-    df = df[(df.trace != 'end') & (method != 'e') & ~(method.str.contains('org.dacapo.harness'))]
-
-    return df
-
-def method(path):
-    try:
-        iters = [f for f in np.sort(os.listdir(path)) if '.csv' in f]
-        warm_up = len(iters) // 5
-        df = pd.concat([pd.read_csv(os.path.join(path, f)).assign(iter = i) for i, f in enumerate(tqdm(iters))])
-    except:
-        iters = np.sort(os.listdir(path + '/0'))
-        warm_up = len(iters) // 5
-        df = pd.concat([pd.read_csv(os.path.join(path, '0', f)).assign(iter = i) for i, f in enumerate(tqdm(iters))])
-
-    df = filter_to_application(df)
-    df.trace = df.trace.str.join(';')
+def filter_to_application(df, traces = None, frame_filter = FILTER):
+    traces = traces if traces is not None else TraceDictionary()
+
+    df = df[~df.name.isin(JVM_JAVA)]
+    stack = traces.encode(df.trace)
+
+    # the filter only looks at the stack, so each distinct one is filtered once and interned again
+    filtered = {}
+    for id in np.unique(stack[stack > -1]):
+        trace = frame_filter.apply(traces.names(id))
+        if trace is not None:
+            filtered[id] = traces.intern(trace)
+
+    df = df.assign(stack = pd.Series(stack, index = df.index).map(filtered))
+    df = df[df['stack'] == df['stack']]
+
+    return df.assign(stack = df['stack'].astype(int))
+
+def method_sums(df):
+    traces = TraceDictionary()
+    df = filter_to_application(df, traces)
     df['energy'] = df.package + df.dram
 
-    df = df.groupby(['trace', 'iter']).energy.agg(('sum', 'count'))
+    df = df.groupby('stack').energy.agg(('sum', 'count'))
     df.columns = ['energy', 'time']
+    df['trace'] = traces.decode(df.index.values, ';')
+
+    return df.sort_values('trace').reset_index(drop = True)[['trace', 'energy', 'time']]
+
+def method(path, cache = None):
+    iters = [f for f in np.sort(os.listdir(path)) if '.csv' in f]
+    if not iters and os.path.isdir(os.path.join(path, '0')):
+        # older runs kept their method data one level down and never had partials
+        path, cache = os.path.join(path, '0'), None
+        iters = [f for f in np.sort(os.listdir(path)) if '.csv' in f]
+
+    sums = GroupSums(['trace', 'iter'], ['energy', 'time'])
+    for i, f in enumerate(tqdm(iters)):
+        sums.add(cached(path, f, cache, method_sums).assign(iter = i))
 
-    return df
+    return sums.frame()
@@ -1,56 +1,18 @@
 import json
 import os
-import re
 
 import numpy as np
 import pandas as pd
 
 from tqdm import tqdm
 
-import operator
-
-_RAPL_WRAPAROUND = 16384
-
-def rapl_wrap_around(reading):
-    if reading >= 0:
-        return reading
-    else:
-        return max(reading + _RAPL_WRAPAROUND, 0)
-
-JVM_JAVA = (
-    'Common-Cleaner',
-    'Finalizer',
-    'Java2D Disposer',
-    'process reaper',
-    'Reference Handl',
-    'Reference Handler',
-    'Signal Dispatch',
-    'Signal Dispatcher'
-)
+from columnar import read_table
+from summary.component import classify
+from traces import count_frames
 
-JIT = ('(C\d CompilerThre)', )
-GC = ('(G\d Conc#\d)', '(G\d Refine#\d)', '(G\d Young RemSet)', '(G\d Main Marker)', '(GC Thread#\d)')
-OTHER = (
-    'java',
-    'Service Thread',
-    'Sweeper thread',
-    'VM Periodic Tas',
-    'VM Thread'
-)
-
-JVM_C = re.compile('|'.join(JIT + GC + OTHER))
-
-def thread_to_component(thread):
-    if 'chappie' in thread or thread == 'Honest Profiler':
-        return 'chappie'
-    elif thread in JVM_JAVA:
-        return 'jvm-java'
-    elif JVM_C.match(thread) is not None:
-        return 'jvm-c'
-    else:
-        return 'application'
+import operator
 
-def runtime(path):
+def runtime(path, precision = None):
     raw_root = os.path.join(path, 'raw')
     processed_root = os.path.join(path, 'processed')
 
@@ -66,13 +28,10 @@ def runtime(path):
         duration = (max(timestamps) - min(timestamps)) / 1000
 
         if os.path.exists(os.path.join(raw_root, '0', 'method.csv')):
-            df = pd.read_csv(os.path.join(processed_root, 'method', '{}.csv'.format(f)))#.dropna()
-
-            method = df.trace .str.split('@').apply(set).tolist()
-            method = len({m for trace in method for m in trace})
+            method = count_frames([os.path.join(processed_root, 'method', '{}.csv'.format(f))], delimiter = ',', precision = precision).count()
 
-            df = pd.read_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f))).dropna()
-            df['component'] = df.name.apply(thread_to_component)
+            df = read_table(os.path.join(processed_root, 'energy', '{}.csv'.format(f)), delimiter = ',').dropna()
+            df['component'] = classify(df.name)
             df = df[(df.component == 'application') & (df.id > -1)]
 
             unique_threads = len(df.id.unique())
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pandas.testing import assert_frame_equal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from attribution.processing import jiffies
+
+# the accumulating loop that jiffies_smoothing replaced, kept as the reference
+def loop_smoothing(df):
+    app = sys = 0
+    records = []
+    i = 0
+    for epoch, socket, app_jiff, sys_jiff in df[['epoch', 'socket', 'app', 'sys']].values:
+        app += app_jiff
+        sys += sys_jiff
+        i += 1
+        if (app > 0 and app <= sys) or i % 10:
+            records.append([epoch, socket, min(int(app), int(sys)), sys])
+            app = sys = 0
+            i = 0
+
+    grp = pd.DataFrame(data = records, columns = ['epoch', 'socket', 'app', 'sys']).set_index(['epoch', 'socket'])
+    grp['jiffies'] = (grp.app / grp.sys).fillna(1).replace(np.inf, 1).clip(0, 1)
+
+    df = pd.concat([df.set_index(['epoch', 'socket']), grp], axis = 1).bfill().fillna(0)
+    df = df[df.jiffies > 0]
+
+    return df.reset_index()[['epoch', 'jiffies']]
+
+def loop_align(app, sys):
+    jiff = pd.concat([
+        app.groupby(['epoch', 'socket']).jiffies.sum(),
+        sys.groupby(['epoch', 'socket']).jiffies.sum()
+    ], axis = 1)
+    jiff.columns = ['app', 'sys']
+    jiff = jiff.reset_index().groupby('socket').apply(loop_smoothing)
+
+    jiff = pd.merge(app.reset_index(), jiff, on = ['epoch', 'socket'], suffixes = ('_', ''))
+    jiff.socket = jiff.socket.astype(int)
+
+    return jiff.set_index(['epoch', 'tid', 'os_name'])[['socket', 'jiffies']]
+
+def synthetic_run(path, epochs = 60, cpus = 40, seed = 0):
+    # cumulative jiffies like /proc reports them; 1003 exits halfway through and the
+    # cpus sometimes sit idle so some epochs have no system jiffies at all. the loop can't
+    # take a socket without any thread, so 1001 and 1002 stay on one socket each
+    rng = np.random.RandomState(seed)
+    half = cpus // 2
+    placement = {1001: lambda: rng.randint(0, half), 1002: lambda: rng.randint(half, cpus)}
+
+    tids = {1001: epochs, 1002: epochs, 1003: epochs // 2, 1004: epochs}
+    task = []
+    for tid, last in tids.items():
+        user = sys = 0
+        for epoch in range(1, last + 1):
+            user += rng.randint(0, 4)
+            sys += rng.randint(0, 2)
+            task.append([epoch, tid, placement.get(tid, lambda: rng.randint(0, cpus))(), 'R', user, sys])
+    task = pd.DataFrame(task, columns = ['epoch', 'tid', 'cpu', 'state', 'user', 'sys'])
+    task.to_csv(os.path.join(path, 'task.csv'), sep = ';', index = False)
+
+    columns = ['user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal', 'guest', 'guest_nice']
+    counters = np.zeros((cpus, len(columns)), dtype = int)
+    cpu = []
+    for epoch in range(1, epochs + 1):
+        busy = rng.rand(cpus) < 0.7
+        counters[busy, :3] += rng.randint(0, 3, size = (busy.sum(), 3))
+        counters[:, 3] += rng.randint(0, 4, size = cpus)
+        for n in range(cpus):
+            cpu.append([epoch, n, rng.randint(800000, 2400000)] + list(counters[n]))
+    cpu = pd.DataFrame(cpu, columns = ['epoch', 'cpu', 'freq'] + columns)
+    cpu.to_csv(os.path.join(path, 'cpu.csv'), sep = ';', index = False)
+
+    name = {str(tid): 'java' for tid in tids}
+
+    return (
+        pd.read_csv(os.path.join(path, 'task.csv'), delimiter = ';').sort_values('epoch'),
+        name,
+        pd.read_csv(os.path.join(path, 'cpu.csv'), delimiter = ';').sort_values('epoch')
+    )
+
+def test_smoothing_matches_loop(tmp_path):
+    task, name, cpu = synthetic_run(str(tmp_path))
+    app = jiffies.process_app(task, name)
+    sys = jiffies.process_sys(cpu)
+
+    assert_frame_equal(jiffies.align(app, sys), loop_align(app, sys))
+
+def test_smoothing_matches_loop_per_socket():
+    rng = np.random.RandomState(1)
+    for _ in range(50):
+        n = rng.randint(1, 40)
+        df = pd.DataFrame({
+            'epoch': np.arange(1, n + 1),
+            'socket': rng.randint(1, 3),
+            'app': rng.randint(0, 6, size = n),
+            'sys': rng.randint(0, 4, size = n)
+        })
+
+        assert_frame_equal(jiffies.jiffies_smoothing(df), loop_smoothing(df))
@@ -0,0 +1,92 @@
+import json
+import os
+import resource
+import time
+
+from lazy import module
+
+pd = module('pandas')
+
+TIMINGS = 'timings.json'
+
+def peak_rss():
+    # linux reports this in kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class Stages:
+    # stands in for a tqdm status: every new description closes the stage before it
+    def __init__(self, status = None):
+        self.status = status
+        self.records = {}
+        self.current = None
+
+    def set_description(self, stage):
+        self.stop()
+        if self.status:
+            self.status.set_description(stage)
+
+        self.current = {
+            'stage': stage.strip(),
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'rss': peak_rss(),
+            'rows': None
+        }
+
+    def rows(self, rows):
+        if self.current is not None:
+            self.current['rows'] = int(rows)
+
+    def stop(self):
+        if self.current is None:
+            return
+
+        stage = self.current['stage']
+        # windowed runs go through the same stages over and over, so they add up
+        record = self.records.setdefault(stage, {'wall': 0, 'cpu': 0, 'rss': 0, 'rows': None, 'calls': 0})
+        record['wall'] += time.perf_counter() - self.current['wall']
+        record['cpu'] += time.process_time() - self.current['cpu']
+        record['rss'] = max(record['rss'], peak_rss() - self.current['rss'])
+        if self.current['rows'] is not None:
+            record['rows'] = (record['rows'] or 0) + self.current['rows']
+        record['calls'] += 1
+
+        self.current = None
+
+    def dump(self):
+        self.stop()
+        return [dict(stage = stage, **record) for stage, record in self.records.items()]
+
+def rows(status, count):
+    # plain progress bars have nothing to count into
+    if isinstance(status, Stages):
+        status.rows(count)
+
+def load(processed_root):
+    path = os.path.join(processed_root, TIMINGS)
+    if os.path.exists(path):
+        return json.load(open(path))
+    else:
+        return {'iterations': {}, 'summary': []}
+
+def dump(timings, processed_root):
+    json.dump(timings, open(os.path.join(processed_root, TIMINGS), 'w'), indent = 2)
+
+def table(timings):
+    df = pd.DataFrame([
+        dict(record, part = 'processing', iter = f) for f, records in timings['iterations'].items() for record in records
+    ] + [
+        dict(record, part = 'summary', iter = 'summary') for record in timings['summary']
+    ])
+    if df.empty:
+        return df
+
+    # stages keep the order they ran in instead of being sorted by name
+    order = list(dict.fromkeys(zip(df.part, df.stage)))
+    df = df.groupby(['part', 'stage'], sort = False).agg({
+        'wall': 'sum', 'cpu': 'sum', 'rss': 'max', 'rows': 'sum', 'iter': 'nunique'
+    }).loc[order]
+    df['rss'] /= 1024 * 1024
+    df.columns = ['wall (s)', 'cpu (s)', 'peak rss delta (MB)', 'rows', 'iterations']
+
+    return df
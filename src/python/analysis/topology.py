@@ -0,0 +1,20 @@
+import numpy as np
+
+# runs from before the topology was recorded all come from our 2 x 20 cpu hosts
+LEGACY_CPUS_PER_SOCKET = 20
+
+def socket_table(topology = None, cpus = 0):
+    # cpu -> socket lookup, numbered from 1 like the energy sockets; a recorded
+    # topology.json maps cpus to their physical package ids
+    if topology:
+        topology = {int(cpu): int(socket) for cpu, socket in topology.items()}
+        # cpus that weren't recorded (offline when profiling) stay on the first socket
+        table = np.ones(max(max(topology) + 1, cpus), dtype = int)
+        table[list(topology.keys())] = np.array(list(topology.values())) + 1
+    else:
+        table = np.minimum(np.arange(cpus) // LEGACY_CPUS_PER_SOCKET, 1) + 1
+
+    return table
+
+def sockets(cpu, table):
+    return table.take(np.asarray(cpu))
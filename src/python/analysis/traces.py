@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from columnar import iter_table
+
+class TraceDictionary:
+    def __init__(self):
+        self.frame_ids = {}
+        self.frames = []
+        self.stack_ids = {}
+        self.stacks = []
+
+    def frame(self, name):
+        if name not in self.frame_ids:
+            self.frame_ids[name] = len(self.frames)
+            self.frames.append(name)
+
+        return self.frame_ids[name]
+
+    def intern(self, frames):
+        stack = tuple(self.frame(name) for name in frames)
+        if stack not in self.stack_ids:
+            self.stack_ids[stack] = len(self.stacks)
+            self.stacks.append(np.array(stack, dtype = int))
+
+        return self.stack_ids[stack]
+
+    def encode(self, traces, sep = '@'):
+        # only the distinct strings get split, every sample just gets the id of its stack
+        codes, uniques = pd.factorize(traces)
+        ids = np.array([self.intern(trace.split(sep)) for trace in uniques] + [-1], dtype = int)
+
+        return ids[codes]
+
+    def names(self, stack):
+        return [self.frames[frame] for frame in self.stacks[stack]]
+
+    def decode(self, stacks, sep = '@'):
+        codes, uniques = pd.factorize(stacks)
+        traces = np.array([sep.join(self.names(stack)) if stack > -1 else np.nan for stack in uniques] + [np.nan], dtype = object)
+
+        return traces[codes]
+
+class FrameSet:
+    # exact count of the distinct frames in a stream of traces; each distinct trace
+    # is only split once and no sample's frames are kept around
+    def __init__(self):
+        self.frames = set()
+        self.traces = set()
+
+    def add(self, traces, sep = '@'):
+        for trace in pd.unique(traces.dropna()):
+            if trace not in self.traces:
+                self.traces.add(trace)
+                self.frames.update(trace.split(sep))
+
+    def merge(self, other):
+        self.frames |= other.frames
+        self.traces |= other.traces
+
+    def count(self):
+        return len(self.frames)
+
+class FrameSketch:
+    # hyperloglog estimate of the distinct frames in a stream of traces, in 2 ** precision
+    # bytes; the hash is pandas' fixed-key one, so sketches from different processes merge
+    def __init__(self, precision = 12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype = np.uint8)
+
+    def add(self, traces, sep = '@'):
+        traces = pd.Series(pd.unique(traces.dropna()))
+        frames = pd.unique(traces.str.split(sep).explode().values)
+        if len(frames) == 0:
+            return
+
+        hashes = pd.util.hash_array(frames.astype(object))
+        register = (hashes >> np.uint64(64 - self.precision)).astype(int)
+
+        # the rank is where the first set bit is in the 32 bits after the register's
+        rest = ((hashes << np.uint64(self.precision)) >> np.uint64(32)).astype(float)
+        rank = np.full(len(rest), 33, dtype = np.uint8)
+        rank[rest > 0] = 32 - np.floor(np.log2(rest[rest > 0])).astype(np.uint8)
+
+        np.maximum.at(self.registers, register, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out = self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m ** 2 / np.sum(2.0 ** -self.registers.astype(float))
+
+        # small cardinalities leave registers empty, which linear counting handles better
+        empty = (self.registers == 0).sum()
+        if estimate <= 2.5 * m and empty > 0:
+            estimate = m * np.log(m / empty)
+
+        return int(round(estimate))
+
+def count_frames(paths, sep = '@', delimiter = ';', precision = None):
+    # streams the traces of every file into one counter; exact unless a precision is given
+    counter = FrameSet() if precision is None else FrameSketch(precision)
+    for path in paths:
+        for df in iter_table(path, ['trace'], delimiter):
+            counter.add(df.trace, sep)
+
+    return counter
@@ -0,0 +1,147 @@
+import argparse
+import os
+import runpy
+import sys
+
+from functools import partial
+from multiprocessing import Pool
+from os.path import dirname, realpath
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pandas as pd
+
+from tqdm import tqdm
+
+python_root = dirname(dirname(realpath(__file__)))
+chappie_root = dirname(dirname(python_root))
+sys.path.append(python_root)
+sys.path.append(os.path.join(python_root, 'analysis'))
+
+from analysis.__main__ import pending, plotting, process_iteration, processing_options, record, record_summary, summarized, summary, summary_options
+from convergence import Tracker
+
+REPORTS = os.path.join(chappie_root, 'fse2020', 'report.py')
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-d', '--data-directory')
+    parser.add_argument('-j', '--jobs', type = int, default = os.cpu_count())
+    parser.add_argument('-f', '--force', action = 'store_true')
+    parser.add_argument('-w', '--window', type = int, default = 0)
+    parser.add_argument('-a', '--alignment', choices = ('bucket', 'interval'), default = 'bucket')
+    parser.add_argument('-l', '--limit', type = int, default = 0)
+    parser.add_argument('--threshold', type = float, default = 0.95)
+    parser.add_argument('--no-plots', action = 'store_true')
+    parser.add_argument('--no-reports', action = 'store_true')
+
+    args = parser.parse_args()
+    if args.window > 0 and args.alignment == 'interval':
+        raise ValueError('interval alignment needs the whole run; drop --window')
+    if args.window > 0 and args.limit != 0:
+        raise ValueError('gap filling needs the whole run; drop --window')
+
+    return args
+
+def read_rates(data_directory):
+    # one "bench size rate" line per benchmark
+    rates = pd.read_csv(os.path.join(data_directory, '.calm-rates'), delimiter = ' ', header = None)
+    rates.columns = ['bench', 'size', 'rate']
+
+    return rates
+
+def batches(data_directory, bench):
+    bench_root = os.path.join(data_directory, 'profiling', bench)
+    if not os.path.exists(bench_root):
+        return {}
+
+    return {
+        int(batch): os.path.join(bench_root, batch) for batch in os.listdir(bench_root)
+        if batch.isdigit() and os.path.exists(os.path.join(bench_root, batch, 'raw'))
+    }
+
+# the workers are forked from here, so these only ship the arguments and results back and forth
+def process_task(task, window = 0, alignment = 'bucket', limit = 0):
+    work_directory, f = task
+    return work_directory, process_iteration(work_directory, f, window = window, alignment = alignment, limit = limit)
+
+def summary_task(work_directory):
+    return work_directory, summary(work_directory).reset_index()
+
+def plotting_task(work_directory):
+    plotting(work_directory)
+    return work_directory
+
+def run(pool, name, task, args):
+    status = tqdm(pool.imap_unordered(task, args), total = len(args))
+    status.set_description(name)
+
+    return list(status)
+
+def main():
+    args = parse_args()
+    data_directory = args.data_directory
+
+    rates = read_rates(data_directory)
+    work_directories = {bench: batches(data_directory, bench) for bench in rates.bench}
+
+    # one pool for every stage of every benchmark, so each worker only imports everything once
+    with Pool(args.jobs) as pool:
+        current = {}
+        tasks = []
+        limit = args.limit if args.limit >= 0 else None
+        for work_directory in (work_directory for bench in work_directories.values() for work_directory in bench.values()):
+            iters, current[work_directory] = pending(work_directory, args.force, processing_options(args.window, args.alignment, limit))
+            tasks.extend((work_directory, f) for f in iters)
+
+        stages = {work_directory: {} for work_directory in current}
+        for work_directory, (f, stage) in run(pool, 'process', partial(process_task, window = args.window, alignment = args.alignment, limit = limit), tasks):
+            stages[work_directory][f] = stage
+        for work_directory in current:
+            record(work_directory, current[work_directory], stages[work_directory])
+
+        # skipping the plots is recorded as selecting none of them
+        options = summary_options({'plots': [] if args.no_plots else None})
+        updated = {work_directory for work_directory, _ in tasks} | {
+            work_directory for work_directory in current if not summarized(work_directory, options)
+        }
+
+        # the fresh method summaries go straight into the convergence check instead of being read back
+        methods = dict(run(pool, 'summary', summary_task, sorted(updated)))
+
+        convergence = []
+        for bench, directories in work_directories.items():
+            if not directories:
+                continue
+
+            method_file = lambda work_directory: os.path.join(work_directory, 'summary', 'method.csv')
+            versions = {str(batch): os.path.getmtime(method_file(work_directory)) for batch, work_directory in directories.items()}
+
+            bench_root = os.path.join(data_directory, 'profiling', bench)
+            tracker = Tracker.load(bench_root)
+            if tracker.outdated(versions):
+                tracker = Tracker()
+            for batch, work_directory in sorted(directories.items()):
+                if str(batch) not in tracker.batches:
+                    df = methods[work_directory] if work_directory in methods else pd.read_csv(method_file(work_directory))
+                    tracker.update(str(batch), df, versions[str(batch)])
+            tracker.dump(bench_root)
+
+            convergence.append((bench, len(directories), tracker.correlation, tracker.correlation >= args.threshold))
+
+        if not args.no_plots:
+            run(pool, 'plotting', plotting_task, sorted(updated))
+        for work_directory in updated:
+            record_summary(work_directory, options)
+
+        if not args.no_reports:
+            # the reports share one dataset, so they run one after another in this process
+            runpy.run_path(REPORTS)['run'](data_directory)
+
+    convergence = pd.DataFrame(convergence, columns = ['bench', 'batches', 'correlation', 'converged'])
+    print(convergence.set_index('bench').to_string())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from os.path import dirname, realpath
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pandas as pd
+
+sys.path.append(os.path.join(dirname(realpath(__file__)), '..', 'analysis'))
+
+import attribution as attr
+import columnar
+import summary as smry
+import plotting as plt
+
+from generate import SIZES, generate
+
+STAGES = ('attribute', 'align', 'summary', 'plotting')
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-s', '--sizes', nargs = '+', choices = SIZES.keys(), default = ['small'])
+    parser.add_argument('-i', '--iterations', type = int, default = 1)
+    parser.add_argument('-r', '--repeat', type = int, default = 1)
+    parser.add_argument('--stages', nargs = '+', choices = STAGES, default = list(STAGES))
+    parser.add_argument('--no-memory', action = 'store_true')
+    parser.add_argument('-dir', '--work-directory')
+    parser.add_argument('-o', '--output')
+
+    return parser.parse_args()
+
+def measure(stage, repeat = 1, memory = True):
+    # tracemalloc slows everything down, so the peak comes from its own run
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = stage()
+        elapsed.append(time.perf_counter() - start)
+
+    peak = float('nan')
+    if memory:
+        tracemalloc.start()
+        result = stage()
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    return result, min(elapsed), peak
+
+def align(raw_path, energy):
+    timestamps = json.load(open(os.path.join(raw_path, 'time.json')))
+    timestamps = {int(k): int(v) for k, v in timestamps.items()}
+    start, end = min(timestamps.values()), max(timestamps.values())
+
+    id = json.load(open(os.path.join(raw_path, 'id.json')))
+
+    method = columnar.read_table(os.path.join(raw_path, 'method.csv'))
+    method = attr.bucket_methods(method, start, end).sort_index()
+
+    energy = energy.reset_index()
+    energy = energy[energy.id > 0].set_index(['timestamp', 'id'])
+
+    return attr.align(energy, method, id, limit = 0)
+
+def benchmark(work_directory, stages = STAGES, repeat = 1, memory = True):
+    raw_root = os.path.join(work_directory, 'raw')
+    processed_root = os.path.join(work_directory, 'processed')
+    summary_root = os.path.join(work_directory, 'summary')
+    for path in (processed_root, os.path.join(processed_root, 'energy'), os.path.join(processed_root, 'method'), summary_root, os.path.join(work_directory, 'plots')):
+        if not os.path.exists(path):
+            os.mkdir(path)
+
+    iters = sorted(os.listdir(raw_root), key = int)
+    timings = []
+
+    # every stage feeds the next one, so the unselected ones still run but aren't reported
+    energy, t, m = measure(lambda: {f: attr.attribute(os.path.join(raw_root, f)) for f in iters}, repeat, memory and 'attribute' in stages)
+    timings.append(('attribute', t, m))
+    for f, df in energy.items():
+        df.to_csv(os.path.join(processed_root, 'energy', '{}.csv'.format(f)))
+
+    method, t, m = measure(lambda: {f: align(os.path.join(raw_root, f), energy[f]) for f in iters}, repeat, memory and 'align' in stages)
+    timings.append(('align', t, m))
+    for f, df in method.items():
+        df.to_csv(os.path.join(processed_root, 'method', '{}.csv'.format(f)))
+
+    if 'summary' in stages or 'plotting' in stages:
+        summary, t, m = measure(lambda: (
+            smry.runtime(work_directory),
+            smry.component(os.path.join(processed_root, 'energy')),
+            smry.method(os.path.join(processed_root, 'method'))
+        ), repeat, memory and 'summary' in stages)
+        timings.append(('summary', t, m))
+        for name, df in zip(('runtime', 'component', 'method'), summary):
+            df.to_csv(os.path.join(summary_root, '{}.csv'.format(name)), header = True)
+
+    if 'plotting' in stages:
+        _, t, m = measure(lambda: (
+            plt.correlation(summary_root),
+            plt.ranking(summary_root),
+            plt.cfa(summary_root)
+        ), repeat, memory)
+        timings.append(('plotting', t, m))
+
+    return pd.DataFrame(timings, columns = ['stage', 'time', 'memory']).set_index('stage').loc[list(stages)]
+
+def main():
+    args = parse_args()
+
+    root = args.work_directory if args.work_directory is not None else tempfile.mkdtemp()
+
+    results = []
+    try:
+        for size in args.sizes:
+            work_directory = os.path.join(root, size)
+            if not os.path.exists(os.path.join(work_directory, 'raw')):
+                generate(work_directory, args.iterations, **SIZES[size])
+
+            df = benchmark(work_directory, args.stages, args.repeat, not args.no_memory)
+            results.append(df.assign(size = size))
+    finally:
+        if args.work_directory is None:
+            shutil.rmtree(root)
+
+    results = pd.concat(results).reset_index().set_index(['size', 'stage'])
+    results.columns = ['time (s)', 'peak memory (MB)']
+    print(results.round(3).to_string())
+
+    if args.output is not None:
+        results.to_csv(args.output)
+
+if __name__ == '__main__':
+    main()
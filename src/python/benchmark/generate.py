@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+_RAPL_WRAPAROUND = 16384
+
+SIZES = {
+    'small': {'threads': 8, 'epochs': 250, 'traces': 100},
+    'medium': {'threads': 32, 'epochs': 2500, 'traces': 1000},
+    'large': {'threads': 64, 'epochs': 10000, 'traces': 5000},
+}
+DEFAULTS = {'threads': 8, 'sockets': 2, 'cpus': 40, 'epochs': 250, 'depth': 16, 'traces': 100, 'rate': 4}
+
+# threads every jvm shows to the vm profiler; the worker threads are added on top
+JAVA_THREADS = ('main', 'Reference Handler', 'Finalizer', 'Signal Dispatcher', 'Common-Cleaner', 'chappie-0')
+# threads that only show up as tasks
+OS_THREADS = ('java', 'VM Thread', 'GC Thread#0', 'GC Thread#1', 'G1 Main Marker', 'G1 Conc#0', 'C2 CompilerThread0', 'C1 CompilerThread0', 'VM Periodic Task', 'Service Thread', 'Sweeper thread')
+
+VM_STATES = ('RUNNABLE', 'BLOCKED', 'WAITING', 'TIMED_WAITING')
+TASK_STATES = ('RUNNABLE', 'INTERRUPTIBLE', 'UNINTERRUPTIBLE')
+
+def write_csv(df, path):
+    df.to_csv(path, sep = ';', index = False)
+
+def write_json(records, path):
+    json.dump({str(k): str(v) for k, v in records.items()}, open(path, 'w'), indent = 2)
+
+def make_stacks(rng, depth, traces):
+    # application frames sit on top of some library and native frames with the harness at the bottom
+    app = ['org.bench.pkg{}.Class{}.method{}'.format(i % 7, i % 31, i) for i in range(max(traces // 2, 1))]
+    lib = ['java.util.HashMap.get', 'java.util.ArrayList.add', 'java.lang.String.hashCode', 'jdk.internal.misc.Unsafe.park', 'sun.nio.ch.EPoll.wait']
+    native = ['libjvm.so', '__clock_gettime', 'Interpreter', 'JavaCalls::call_helper', '[unknown]']
+
+    stacks = []
+    for _ in range(traces):
+        size = int(rng.integers(2, depth + 1))
+        top = list(rng.choice(lib + native, int(rng.integers(0, 3))))
+        stacks.append('@'.join(top + list(rng.choice(app, size)) + ['org.dacapo.harness.Callback.start']))
+
+    return stacks
+
+def generate_iteration(path, rng, threads, sockets, cpus, epochs, depth, traces, rate):
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    java = list(JAVA_THREADS) + ['worker-{}'.format(i) for i in range(threads)]
+    ids = np.arange(1, len(java) + 1)
+    pid = int(rng.integers(1000, 30000))
+    tids = pid + ids
+
+    write_json(dict(zip(ids, java)), os.path.join(path, 'id.json'))
+    # one thread has no native id so it has to be matched by name
+    write_json({id: tid for id, tid, name in zip(ids, tids, java) if name != 'Signal Dispatcher'}, os.path.join(path, 'tid.json'))
+
+    os_tids = np.r_[tids, pid + len(java) + 1 + np.arange(len(OS_THREADS))]
+    os_names = [name[:15] for name in java] + [name[:15] for name in OS_THREADS]
+    write_json(dict(zip(os_tids, os_names)), os.path.join(path, 'name.json'))
+
+    timestamps = 10 ** 12 + np.arange(epochs) * rate * 1000000 + rng.integers(0, 100000, epochs)
+    write_json(dict(zip(range(epochs), timestamps)), os.path.join(path, 'time.json'))
+    epoch = np.arange(1, epochs)
+
+    # workers come and go during the run, everything else lives the whole time
+    start = np.r_[np.zeros(len(JAVA_THREADS)), rng.integers(0, epochs // 10 + 1, threads)].astype(int)
+    end = np.r_[np.full(len(JAVA_THREADS), epochs), epochs - rng.integers(0, epochs // 10 + 1, threads)].astype(int)
+    live = (epoch[:, None] >= start) & (epoch[:, None] < end)
+
+    e, t = np.nonzero(live)
+    write_csv(pd.DataFrame({
+        'epoch': epoch[e],
+        'id': ids[t],
+        'state': np.array(VM_STATES)[rng.integers(0, len(VM_STATES), len(e))]
+    }), os.path.join(path, 'vm.csv'))
+
+    write_csv(pd.DataFrame({
+        'epoch': epoch,
+        'elapsed': rng.integers(10000, 200000, len(epoch)),
+        'total': rate * 1000000
+    }), os.path.join(path, 'chappie.csv'))
+
+    live = np.c_[live, np.ones((len(epoch), len(OS_THREADS)), dtype = bool)]
+    user = np.cumsum(rng.integers(0, 3, live.shape) * live, axis = 0)
+    sys = np.cumsum(rng.integers(0, 2, live.shape) * live, axis = 0)
+    e, t = np.nonzero(live)
+    write_csv(pd.DataFrame({
+        'epoch': epoch[e],
+        'tid': os_tids[t],
+        'cpu': rng.integers(0, cpus, len(e)),
+        'state': np.array(TASK_STATES)[rng.integers(0, len(TASK_STATES), len(e))],
+        'user': user[e, t],
+        'sys': sys[e, t]
+    }), os.path.join(path, 'task.csv'))
+
+    cpu = pd.DataFrame({'epoch': np.repeat(epoch, cpus), 'cpu': np.tile(np.arange(cpus), len(epoch))})
+    cpu['freq'] = rng.integers(800000, 3000000, len(cpu))
+    for counter in ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal', 'guest', 'guest_nice'):
+        cpu[counter] = 0
+    for counter in ('user', 'system', 'idle'):
+        cpu[counter] = np.cumsum(rng.integers(0, 4, (len(epoch), cpus)), axis = 0).ravel()
+    write_csv(cpu, os.path.join(path, 'cpu.csv'))
+
+    # rapl counters are cumulative joules that wrap around
+    package = np.cumsum(rng.uniform(0, 10, (len(epoch), sockets)), axis = 0) % _RAPL_WRAPAROUND
+    dram = np.cumsum(rng.uniform(0, 1, (len(epoch), sockets)), axis = 0) % _RAPL_WRAPAROUND
+    write_csv(pd.DataFrame({
+        'epoch': np.repeat(epoch, sockets),
+        'socket': np.tile(np.arange(sockets), len(epoch)),
+        'package': package.ravel(),
+        'dram': dram.ravel()
+    }), os.path.join(path, 'energy.csv'))
+
+    write_csv(pd.DataFrame({
+        'epoch': np.repeat(epoch, cpus),
+        'cpu': np.tile(np.arange(cpus), len(epoch)),
+        'freq': rng.integers(800000, 3000000, len(epoch) * cpus)
+    }), os.path.join(path, 'freqs.csv'))
+    write_json({cpu: 3000000 for cpu in range(cpus)}, os.path.join(path, 'freqs.json'))
+    write_json({cpu: cpu * sockets // cpus for cpu in range(cpus)}, os.path.join(path, 'topology.json'))
+
+    # the trace profiler dumps about one sample per live thread per epoch, ten epochs at a time
+    stacks = np.array(make_stacks(rng, depth, traces))
+    e, t = np.nonzero(live & (rng.random(live.shape) < 0.5))
+    sampled = timestamps[epoch[e]] + rng.integers(0, rate * 1000000, len(e))
+    write_csv(pd.DataFrame({
+        'epoch': np.minimum(epoch[e] // 10 * 10 + 10, epochs - 1),
+        'timestamp': sampled,
+        'id': os_tids[t],
+        'trace': stacks[rng.zipf(1.5, len(e)) % len(stacks)]
+    }).sort_values(['epoch', 'timestamp']), os.path.join(path, 'method.csv'))
+
+def generate(path, iterations = 1, seed = 0, **size):
+    size = dict(DEFAULTS, **size)
+    rng = np.random.default_rng(seed)
+
+    if not os.path.exists(os.path.join(path, 'raw')):
+        os.makedirs(os.path.join(path, 'raw'))
+    json.dump({'work_directory': path, 'synthetic': size}, open(os.path.join(path, 'config.json'), 'w'), indent = 2)
+
+    for i in range(iterations):
+        generate_iteration(os.path.join(path, 'raw', str(i)), rng, **size)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('work_directory')
+    parser.add_argument('-s', '--size', choices = SIZES.keys(), default = 'small')
+    parser.add_argument('-i', '--iterations', type = int, default = 1)
+    parser.add_argument('--seed', type = int, default = 0)
+    for key, value in DEFAULTS.items():
+        parser.add_argument('--{}'.format(key), type = int)
+    args = parser.parse_args()
+
+    size = dict(SIZES[args.size], **{key: getattr(args, key) for key in DEFAULTS if getattr(args, key) is not None})
+    generate(args.work_directory, args.iterations, args.seed, **size)
+
+if __name__ == '__main__':
+    main()